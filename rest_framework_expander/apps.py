@@ -0,0 +1,13 @@
+from django.apps import AppConfig
+
+from rest_framework_expander.settings import expander_settings
+
+
+class ExpanderConfig(AppConfig):
+    name = 'rest_framework_expander'
+    verbose_name = 'REST framework expander'
+
+    def ready(self):
+        if expander_settings.WARM_UP:
+            from rest_framework_expander.warmup import ExpanderWarmUp
+            ExpanderWarmUp().run()
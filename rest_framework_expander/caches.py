@@ -0,0 +1,268 @@
+import hashlib
+
+from collections import OrderedDict
+from threading import Lock
+from django.core.cache import caches
+from django.db.models.signals import post_delete, post_save
+from django.http import HttpResponse
+from django.test.signals import setting_changed
+from django.utils import six
+
+from rest_framework_expander.settings import expander_settings
+
+
+class LRUCache(object):
+    """
+    Thread safe in-process cache evicting the least recently used entries.
+    """
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._lock = Lock()
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """
+        Returns the cached value for key, or None.
+        """
+        with self._lock:
+            value = self._entries.pop(key, None)
+
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._entries[key] = value
+
+        return value
+
+    def set(self, key, value):
+        """
+        Caches value for key, evicting the least recently used entries.
+        """
+        if self.max_size <= 0:
+            return
+
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = value
+
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """
+        Removes all entries and resets the counters.
+        """
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+class GenerationCache(object):
+    """
+    Base class for caches invalidated by a generation per model.
+
+    Generations are bumped whenever a row of the model is saved or deleted.
+    """
+    key_prefix = 'expander'
+
+    def __init__(self, alias, timeout):
+        self.alias = alias
+        self.timeout = timeout
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def get_generation_key(self, model):
+        """
+        Returns the cache key of the generation for model.
+
+        Proxy and deferred model classes share the generation of their
+        concrete model.
+        """
+        meta = model._meta.concrete_model._meta
+        return '{}:generation:{}.{}'.format(self.key_prefix, meta.app_label, meta.model_name)
+
+    def invalidate(self, model):
+        """
+        Invalidates all cached entries depending on model.
+        """
+        key = self.get_generation_key(model)
+
+        if not self.cache.add(key, 1, None):
+            try:
+                self.cache.incr(key)
+            except ValueError:
+                self.cache.set(key, 1, None)
+
+
+class RepresentationCache(GenerationCache):
+    """
+    Shares representations between requests through Django's cache framework.
+
+    Entries are keyed by representation signature, primary key, row version,
+    the generation of the model and whether fragments are rendered.
+    """
+
+    def get_generation(self, serializer, model):
+        """
+        Returns the generation for model, fetched at most once per request.
+        """
+        if 'representation_generations' not in serializer.context:
+            serializer.context['representation_generations'] = dict()
+
+        generations = serializer.context['representation_generations']
+
+        if model not in generations:
+            generations[model] = self.cache.get(self.get_generation_key(model), 0)
+
+        return generations[model]
+
+    def get_key(self, serializer, instance):
+        """
+        Returns the cache key of the representation of instance.
+        """
+        meta = getattr(serializer, 'Meta', None)
+        version_field = getattr(meta, 'version_field', None)
+        version = getattr(instance, version_field, None) if version_field else None
+
+        request = serializer.context.get('request')
+        scope = request.build_absolute_uri('/') if request is not None else ''
+
+        generation = self.get_generation(serializer, instance._meta.model)
+
+        parts = (
+            serializer.representation_signature,
+            instance.pk,
+            version,
+            generation,
+            scope,
+            bool(serializer.context.get('expander_fragments')),
+        )
+
+        digest = hashlib.md5(':'.join(six.text_type(part) for part in parts).encode('utf-8'))
+        return '{}:representation:{}'.format(self.key_prefix, digest.hexdigest())
+
+    def get(self, serializer, instance):
+        """
+        Returns the cached representation of instance, or None.
+        """
+        return self.cache.get(self.get_key(serializer, instance))
+
+    def set(self, serializer, instance, representation):
+        """
+        Caches the representation of instance.
+        """
+        self.cache.set(self.get_key(serializer, instance), representation, self.timeout)
+
+
+class ResponseCache(GenerationCache):
+    """
+    Shares rendered responses between requests through Django's cache framework.
+
+    Entries are keyed by the request description of the view and the
+    generations of all models read for the response, so saving a row only
+    invalidates the responses which read its model. Entries keep the headers
+    of the response, except those listed in uncached_headers.
+    """
+    uncached_headers = ('Server-Timing',)
+
+    def get_key(self, parts, models):
+        """
+        Returns the cache key of the response described by parts.
+        """
+        generation_keys = sorted(self.get_generation_key(model) for model in models)
+        generations = self.cache.get_many(generation_keys)
+        parts = list(parts) + ['{}={}'.format(key, generations.get(key, 0)) for key in generation_keys]
+
+        digest = hashlib.md5(':'.join(six.text_type(part) for part in parts).encode('utf-8'))
+        return '{}:response:{}'.format(self.key_prefix, digest.hexdigest())
+
+    def get(self, key):
+        """
+        Returns a new response with the cached content for key, or None.
+        """
+        entry = self.cache.get(key)
+
+        if entry is None:
+            return None
+
+        status, headers, content = entry
+        response = HttpResponse(content, status=status)
+
+        for header, value in headers:
+            response[header] = value
+
+        return response
+
+    def set(self, key, response):
+        """
+        Caches the content and headers of a rendered response.
+        """
+        headers = [(header, value) for header, value in response.items() if header not in self.uncached_headers]
+        entry = (response.status_code, headers, response.content)
+        self.cache.set(key, entry, self.timeout)
+
+
+def invalidate_representations(sender, **kwargs):
+    """
+    Signal receiver invalidating the representations of the sender model.
+    """
+    if representation_cache is not None:
+        representation_cache.invalidate(sender)
+
+
+def invalidate_responses(sender, **kwargs):
+    """
+    Signal receiver invalidating the responses reading the sender model.
+    """
+    if response_cache is not None:
+        response_cache.invalidate(sender)
+
+
+representation_cache = None
+response_cache = None
+
+
+def configure_caches(*args, **kwargs):
+    """
+    Creates the caches selected by the expander settings.
+
+    Connected to setting_changed, so overridden settings apply as well.
+    """
+    global representation_cache, response_cache
+
+    if kwargs.get('setting', 'REST_FRAMEWORK_EXPANDER') != 'REST_FRAMEWORK_EXPANDER':
+        return
+
+    representation_cache = None
+    response_cache = None
+
+    if expander_settings.REPRESENTATION_CACHE:
+        representation_cache = RepresentationCache(
+            expander_settings.REPRESENTATION_CACHE,
+            expander_settings.REPRESENTATION_CACHE_TIMEOUT,
+        )
+
+    if expander_settings.RESPONSE_CACHE:
+        response_cache = ResponseCache(
+            expander_settings.RESPONSE_CACHE,
+            expander_settings.RESPONSE_CACHE_TIMEOUT,
+        )
+
+
+configure_caches()
+setting_changed.connect(configure_caches)
+
+post_save.connect(invalidate_representations, dispatch_uid='expander_post_save')
+post_delete.connect(invalidate_representations, dispatch_uid='expander_post_delete')
+post_save.connect(invalidate_responses, dispatch_uid='expander_responses_post_save')
+post_delete.connect(invalidate_responses, dispatch_uid='expander_responses_post_delete')
@@ -0,0 +1,193 @@
+from collections import OrderedDict
+from rest_framework import fields
+from rest_framework.fields import SkipField
+from rest_framework.relations import HyperlinkedIdentityField, HyperlinkedRelatedField, PrimaryKeyRelatedField
+from rest_framework.serializers import BaseSerializer, Serializer
+
+from rest_framework_expander import utils
+from rest_framework_expander.relations import get_pk_object_class
+from rest_framework_expander.serializers import ExpanderSerializerMixin
+
+
+VALUE = 'value'
+RELATED = 'related'
+EXPANDED = 'expanded'
+FALLBACK = 'fallback'
+
+VALUE_FIELD_CLASSES = (
+    fields.BooleanField,
+    fields.CharField,
+    fields.ChoiceField,
+    fields.DateField,
+    fields.DateTimeField,
+    fields.DecimalField,
+    fields.DurationField,
+    fields.FloatField,
+    fields.IntegerField,
+    fields.NullBooleanField,
+    fields.ReadOnlyField,
+    fields.TimeField,
+)
+
+
+def is_compilable_serializer(serializer):
+    """
+    True if serializer renders its fields without custom representation code.
+    """
+    representation = utils.get_defining_class(type(serializer), 'to_representation')
+    expanded_representation = utils.get_defining_class(type(serializer), 'to_expanded_representation')
+
+    if representation not in (Serializer, ExpanderSerializerMixin):
+        return False
+
+    return expanded_representation in (None, ExpanderSerializerMixin)
+
+
+class ExpanderValuesCompiler(object):
+    """
+    Compiles an object serializer and its expansions into a values() projection.
+
+    Rows are rendered straight from the values() dictionaries. Only fields
+    which are safe on raw column values and relations rendered from primary
+    keys are compiled, others are rendered through the regular path from
+    model instances, see fallback_fields.
+    """
+
+    def __init__(self, serializer, model):
+        self.model = model
+        self.pk_column = model._meta.pk.name
+        self.fallback_fields = list()
+        self.compilable = is_compilable_serializer(serializer)
+
+        if self.compilable:
+            self.steps, columns = self.compile(serializer, model, '', True)
+            self.columns = list(OrderedDict.fromkeys([self.pk_column] + columns))
+
+    def compile(self, serializer, model, prefix, root=False):
+        """
+        Returns the steps and columns for serializer, or None.
+
+        Only the root serializer falls back to model instances, nested
+        serializers with fields which can not be compiled return None.
+        """
+        steps = list()
+        columns = list()
+
+        for field in utils.get_serializer_fields(serializer).values():
+            if field.write_only:
+                continue
+
+            compiled = self.compile_field(field, serializer, model, prefix)
+
+            if compiled is None:
+                if not root:
+                    return None
+
+                self.fallback_fields.append(field)
+                steps.append((FALLBACK, field))
+            else:
+                steps.append(compiled[0])
+                columns.extend(compiled[1])
+
+        return steps, columns
+
+    def compile_field(self, field, serializer, model, prefix):
+        """
+        Returns the step and columns for field, or None.
+        """
+        pk_name = model._meta.pk.name
+
+        if isinstance(field, HyperlinkedIdentityField):
+            if field.lookup_field not in ('pk', pk_name):
+                return None
+
+            column = prefix + pk_name
+            return (RELATED, field, get_pk_object_class(model).from_pk, column), [column]
+
+        source_field = field
+        child = getattr(field, 'child', None)
+
+        if child is not None and child.parent is serializer:
+            source_field = child
+
+        if source_field.source == '*' or len(source_field.source_attrs) != 1:
+            return None
+
+        model_field = utils.get_model_field(model, source_field.source_attrs[0])
+
+        if model_field is None or not model_field.concrete:
+            return None
+
+        column = prefix + model_field.name
+
+        if not model_field.is_relation:
+            if not isinstance(source_field, VALUE_FIELD_CLASSES):
+                return None
+
+            return (VALUE, field, column), [column]
+
+        if not utils.is_single_relation(model_field):
+            return None
+
+        target = model_field.related_model
+
+        if isinstance(source_field, BaseSerializer) and getattr(source_field, 'expanded', True):
+            if not is_compilable_serializer(source_field):
+                return None
+
+            nested = self.compile(source_field, target, column + '__')
+
+            if nested is None:
+                return None
+
+            steps, columns = nested
+            return (EXPANDED, field, steps, column), [column] + columns
+
+        if isinstance(source_field, BaseSerializer):
+            if not getattr(source_field, 'fragmentable', False):
+                return None
+
+        elif isinstance(source_field, HyperlinkedRelatedField):
+            if source_field.lookup_field not in ('pk', target._meta.pk.name):
+                return None
+
+        elif not isinstance(source_field, PrimaryKeyRelatedField):
+            return None
+
+        return (RELATED, field, get_pk_object_class(target).from_pk, column), [column]
+
+    def render(self, row, instance=None):
+        """
+        Returns the representation of a values() row.
+
+        instance is required for rendering the fallback fields.
+        """
+        return self.render_steps(self.steps, row, instance)
+
+    def render_steps(self, steps, row, instance):
+        ret = OrderedDict()
+
+        for step in steps:
+            kind, field = step[0], step[1]
+
+            if kind == VALUE:
+                value = row[step[2]]
+                ret[field.field_name] = field.to_representation(value) if value is not None else None
+
+            elif kind == RELATED:
+                pk = row[step[3]]
+                ret[field.field_name] = field.to_representation(step[2](pk)) if pk is not None else None
+
+            elif kind == EXPANDED:
+                pk = row[step[3]]
+                ret[field.field_name] = self.render_steps(step[2], row, None) if pk is not None else None
+
+            else:
+                try:
+                    attribute = field.get_attribute(instance)
+                except SkipField:
+                    continue
+
+                ret[field.field_name] = field.to_representation(attribute) if attribute is not None else None
+
+        return ret
@@ -6,22 +6,100 @@ class ExpanderContext(object):
     Contains all information related to expander.
     """
 
-    def __init__(self, parent, serializer):
+    def __init__(self, parent, serializer, field_name=None, plan=None):
         self.children = dict()
         self.data = dict()
         self.parent = parent
-        self.serializer = serializer
+        self.field_name = field_name
+        self.plan = plan
+        self._serializer = serializer
 
-    def get_child_by_serializer(self, serializer):
+    @property
+    def fields(self):
         """
-        Returns the expander context for a serializer's field path, or None.
+        Names of the fields to render for this context, or None for all.
+        """
+        return self.plan.fields if self.plan is not None else None
+
+    @property
+    def path(self):
+        """
+        Field names from the root expander context to this one.
+        """
+        if self.parent is None:
+            return tuple()
+
+        return self.parent.path + (self.field_name,)
+
+    @property
+    def serializer(self):
+        """
+        The serializer for this context, resolved through the parent if needed.
+        """
+        if self._serializer is None and self.parent is not None:
+            parent_serializer = self.parent.serializer
+
+            if parent_serializer is not None:
+                serializer = parent_serializer.fields[self.field_name]
+
+                while hasattr(serializer, 'child'):
+                    serializer = serializer.child
+
+                self._serializer = serializer
+
+        return self._serializer
+
+    @property
+    def index(self):
+        """
+        Dictionary mapping field paths to the expander contexts below this one.
+
+        Built on first access, children must not be added afterwards.
+        """
+        if not hasattr(self, '_index'):
+            self._index = dict()
+            self._index[tuple()] = self
+
+            for field_name, child in self.children.items():
+                for path, context in child.index.items():
+                    self._index[(field_name,) + path] = context
+
+        return self._index
+
+    @property
+    def signature(self):
+        """
+        Hashable description of the expansions and field sets below this context.
+        """
+        if not hasattr(self, '_signature'):
+            self._signature = tuple(sorted(
+                (field_name, tuple(sorted(child.fields)) if child.fields is not None else None, child.signature)
+                for field_name, child in self.children.items()
+            ))
+
+        return self._signature
+
+    def remove_child(self, field_name):
+        """
+        Removes a child context, collapsing its expansion.
         """
-        current = self
+        del self.children[field_name]
+        context = self
 
-        for field_name in get_serializer_field_path(serializer):
-            current = current.children.get(field_name)
+        while context is not None:
+            context.__dict__.pop('_index', None)
+            context.__dict__.pop('_signature', None)
+            context = context.parent
 
-            if current is None:
-                break
+    def clear_data(self):
+        """
+        Removes the data of this expander context and all contexts below it.
+        """
+        for context in self.index.values():
+            context.data.clear()
 
-        return current
+    def get_child_by_serializer(self, serializer):
+        """
+        Returns the expander context for a serializer's field path, or None.
+        """
+        return self.index.get(get_serializer_field_path(serializer))
@@ -0,0 +1,119 @@
+from collections import OrderedDict
+from rest_framework.serializers import ListSerializer
+
+from rest_framework_expander import utils
+from rest_framework_expander.exceptions import ExpanderCostExceeded
+from rest_framework_expander.serializers import ExpanderListSerializer
+from rest_framework_expander.settings import expander_settings
+
+
+class ExpanderCostEstimator(object):
+    """
+    Estimates the number of rows loaded for an expander context tree.
+
+    The root renders rows objects and every expansion multiplies the rows
+    of its parent by its cardinality: one for single relations, the preview
+    size for list expansions and relation_fanout for other to many
+    relations. The cost of a context is its rows times the weight found in
+    the expansion_weights of the parent serializer's Meta.
+    """
+    max_cost = expander_settings.MAX_COST
+    fail_on_cost_exceeded = expander_settings.FAIL_ON_COST_EXCEEDED
+    relation_fanout = expander_settings.COST_RELATION_FANOUT
+
+    def __init__(self, expander, rows):
+        self.expander = expander
+        self.rows = rows
+
+    def get_cardinality(self, context):
+        """
+        Returns the estimated number of objects per parent object.
+        """
+        serializer = context.serializer
+
+        if isinstance(serializer.parent, ExpanderListSerializer):
+            return serializer.parent.preview_size
+
+        if isinstance(serializer.parent, ListSerializer):
+            return self.relation_fanout
+
+        field = utils.get_serializer_model_field(serializer)
+
+        if field is not None and field.is_relation and (field.one_to_many or field.many_to_many):
+            return self.relation_fanout
+
+        return 1
+
+    def get_weight(self, context):
+        """
+        Returns the weight of a context from the Meta of its parent serializer.
+        """
+        meta = getattr(context.parent.serializer, 'Meta', None)
+        weights = getattr(meta, 'expansion_weights', dict())
+        return weights.get(context.field_name, 1)
+
+    def get_costs(self):
+        """
+        Returns a dictionary mapping every context of the tree to its cost.
+        """
+        costs = OrderedDict()
+        pending = [(self.expander, self.rows)]
+
+        while pending:
+            context, rows = pending.pop(0)
+
+            if context.parent is None:
+                costs[context] = rows
+            else:
+                costs[context] = rows * self.get_weight(context)
+
+            for child in context.children.values():
+                pending.append((child, rows * self.get_cardinality(child)))
+
+        return costs
+
+    def estimate(self):
+        """
+        Returns the estimated cost of the tree.
+        """
+        return sum(self.get_costs().values())
+
+    def enforce(self):
+        """
+        Keeps the cost of the tree within max_cost and returns it, or None
+        without max_cost.
+
+        Raises ExpanderCostExceeded if fail_on_cost_exceeded is set,
+        otherwise collapses the most expensive leaves until the tree fits.
+        """
+        if self.max_cost is None:
+            return None
+
+        costs = self.get_costs()
+        cost = sum(costs.values())
+
+        if cost <= self.max_cost:
+            return cost
+
+        if self.fail_on_cost_exceeded:
+            raise ExpanderCostExceeded(cost, self.max_cost)
+
+        while cost > self.max_cost:
+            leaves = [context for context in costs if context.parent is not None and not context.children]
+
+            if not leaves:
+                break
+
+            leaf = max(leaves, key=costs.get)
+            leaf.parent.remove_child(leaf.field_name)
+
+            costs = self.get_costs()
+            cost = sum(costs.values())
+
+        # The decisions of the shared plans describe the requested tree, not
+        # the collapsed one, while their field sets still apply.
+        for context in self.expander.index.values():
+            if context.plan is not None:
+                context.plan = context.plan.copy()
+
+        return cost
@@ -1,3 +1,4 @@
+from django.utils.encoding import force_text
 from django.utils.translation import ugettext_lazy as _
 from rest_framework import status
 
@@ -18,6 +19,25 @@ class ExpanderContextMissing(ExpanderException):
     default_detail = _("No such context.")
 
 
+class ExpanderCostExceeded(ExpanderException):
+    status_code = status.HTTP_400_BAD_REQUEST
+    default_detail = _("Expander cost exceeded.")
+
+    def __init__(self, cost, max_cost):
+        super(ExpanderCostExceeded, self).__init__()
+        self.cost = cost
+        self.max_cost = max_cost
+
+        self.detail = {
+            'detail': force_text(self.default_detail),
+            'cost': cost,
+            'max_cost': max_cost,
+        }
+
+    def __str__(self):
+        return force_text(self.default_detail)
+
+
 class ExpanderDepthBreached(ExpanderException):
     status_code = status.HTTP_400_BAD_REQUEST
     default_detail = _("Expander depth breached.")
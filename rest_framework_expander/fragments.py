@@ -0,0 +1,82 @@
+import re
+import uuid
+
+from django.utils import six
+from rest_framework.compat import SHORT_SEPARATORS
+from rest_framework.settings import api_settings
+from rest_framework.utils import encoders
+
+from rest_framework_expander.caches import LRUCache
+
+
+FRAGMENT_MARKER = '\0' + uuid.uuid4().hex
+FRAGMENT_PATTERN = re.compile(r'"\\u0000{0}(\d+)\\u0000{0}"'.format(FRAGMENT_MARKER[1:]).encode('ascii'))
+
+
+class JSONFragment(object):
+    """
+    Representation which is already encoded as JSON, as text or UTF-8 bytes.
+
+    Spliced verbatim into the output of ExpanderFragmentJSONRenderer.
+    """
+    __slots__ = ('content',)
+
+    def __init__(self, content):
+        self.content = content
+
+
+class ExpanderFragmentCache(LRUCache):
+    """
+    Thread safe LRU cache of JSON fragments shared between requests.
+    """
+
+
+class FragmentJSONEncoder(encoders.JSONEncoder):
+    """
+    JSON encoder replacing fragments with placeholders.
+
+    The fragments are collected in order into the fragments list, a
+    placeholder is the index of its fragment between markers unique to the
+    process.
+    """
+
+    def __init__(self, *args, **kwargs):
+        fragments = kwargs.pop('fragments', None)
+        super(FragmentJSONEncoder, self).__init__(*args, **kwargs)
+        self.fragments = fragments if fragments is not None else list()
+
+    def default(self, obj):
+        if isinstance(obj, JSONFragment):
+            self.fragments.append(obj.content)
+            return '{0}{1}{0}'.format(FRAGMENT_MARKER, len(self.fragments) - 1)
+
+        return super(FragmentJSONEncoder, self).default(obj)
+
+
+def splice_fragments(content, fragments):
+    """
+    Replaces the placeholders in rendered content with their fragments.
+    """
+    if not fragments:
+        return content
+
+    def replace(match):
+        fragment = fragments[int(match.group(1))]
+        return fragment if isinstance(fragment, bytes) else fragment.encode('utf-8')
+
+    return FRAGMENT_PATTERN.sub(replace, content)
+
+
+def encode_fragment(representation):
+    """
+    Returns representation as a JSON fragment, encoded like compact JSON output.
+    """
+    content = encoders.JSONEncoder(
+        ensure_ascii=not api_settings.UNICODE_JSON,
+        separators=SHORT_SEPARATORS,
+    ).encode(representation)
+
+    if isinstance(content, six.text_type):
+        content = content.replace(six.u('\u2028'), '\\u2028').replace(six.u('\u2029'), '\\u2029').encode('utf-8')
+
+    return JSONFragment(content)
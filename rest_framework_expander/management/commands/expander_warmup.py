@@ -0,0 +1,21 @@
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand, CommandError
+
+from rest_framework_expander.warmup import ExpanderWarmUp
+
+
+class Command(BaseCommand):
+    help = 'Resolves and caches the expansions of all expander views, failing on broken paths.'
+
+    def handle(self, *args, **options):
+        try:
+            results = ExpanderWarmUp().run()
+        except (ImportError, ImproperlyConfigured) as e:
+            raise CommandError(e)
+
+        for view_class, paths in results.items():
+            self.stdout.write('{}.{}: {} expandable paths'.format(view_class.__module__, view_class.__name__, len(paths)))
+
+            if int(options['verbosity']) > 1:
+                for path in paths:
+                    self.stdout.write('    {}'.format('.'.join(path)))
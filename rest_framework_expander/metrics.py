@@ -0,0 +1,159 @@
+from collections import OrderedDict
+from contextlib import contextmanager
+from timeit import default_timer
+from django.db.backends.utils import CursorWrapper
+from django.dispatch import Signal
+
+
+metrics_recorded = Signal(providing_args=['view', 'request', 'metrics'])
+
+
+class ExpanderCountingCursorWrapper(CursorWrapper):
+    """
+    Cursor wrapper counting the statements executed for metrics.
+    """
+
+    def __init__(self, cursor, db, metrics):
+        super(ExpanderCountingCursorWrapper, self).__init__(cursor, db)
+        self.metrics = metrics
+
+    def callproc(self, procname, params=None):
+        self.metrics.query_count += 1
+        return super(ExpanderCountingCursorWrapper, self).callproc(procname, params)
+
+    def execute(self, sql, params=None):
+        self.metrics.query_count += 1
+        return super(ExpanderCountingCursorWrapper, self).execute(sql, params)
+
+    def executemany(self, sql, param_list):
+        self.metrics.query_count += 1
+        return super(ExpanderCountingCursorWrapper, self).executemany(sql, param_list)
+
+
+class ExpanderMetrics(object):
+    """
+    Records durations and query counts of an expander request.
+
+    Phases are the steps of a view, nodes are expansion paths joined with
+    dots, the root being an empty string. Node durations and query counts
+    exclude the nodes rendered below them. Queries are counted by wrapping
+    the cursors of connection while the metrics are active.
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.phases = OrderedDict()
+        self.nodes = OrderedDict()
+        self.query_count = 0
+        self._stack = list()
+        self._mark = None
+
+    def __enter__(self):
+        self.connection.make_cursor = self.wrap_cursor(type(self.connection).make_cursor)
+        self.connection.make_debug_cursor = self.wrap_cursor(type(self.connection).make_debug_cursor)
+        self._start = (default_timer(), self.get_query_count())
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        del self.connection.make_cursor
+        del self.connection.make_debug_cursor
+        self.record_phase('total', *self._start)
+
+    def wrap_cursor(self, make_cursor):
+        """
+        Returns make_cursor bound to connection, counting queries of its cursors.
+        """
+        def wrapper(cursor):
+            return ExpanderCountingCursorWrapper(make_cursor(self.connection, cursor), self.connection, self)
+
+        return wrapper
+
+    def get_query_count(self):
+        return self.query_count
+
+    def record_phase(self, name, start, queries):
+        """
+        Adds the time and queries since start and queries to a phase.
+        """
+        phase = self.phases.setdefault(name, dict(duration=0.0, queries=0))
+        phase['duration'] += default_timer() - start
+        phase['queries'] += self.get_query_count() - queries
+
+    @contextmanager
+    def phase(self, name):
+        """
+        Measures the enclosed block as phase name.
+        """
+        start, queries = default_timer(), self.get_query_count()
+
+        try:
+            yield
+        finally:
+            self.record_phase(name, start, queries)
+
+    def get_node(self, path):
+        """
+        Returns the counters of the node at path.
+        """
+        key = '.'.join(path)
+
+        if key not in self.nodes:
+            self.nodes[key] = dict(duration=0.0, queries=0, rows=0, cache_hits=0)
+
+        return self.nodes[key]
+
+    def enter_node(self, path):
+        """
+        Attributes time and queries to the node at path until exit_node.
+
+        Returns the counters of the node.
+        """
+        self.flush()
+        node = self.get_node(path)
+        self._stack.append(node)
+        return node
+
+    def exit_node(self):
+        self.flush()
+        self._stack.pop()
+
+    def record_cache_hit(self):
+        """
+        Counts a representation cache hit for the current node.
+        """
+        if self._stack:
+            self._stack[-1]['cache_hits'] += 1
+
+    def flush(self):
+        """
+        Adds the time and queries since the last flush to the current node.
+        """
+        mark = (default_timer(), self.get_query_count())
+
+        if self._stack and self._mark is not None:
+            node = self._stack[-1]
+            node['duration'] += mark[0] - self._mark[0]
+            node['queries'] += mark[1] - self._mark[1]
+
+        self._mark = mark
+
+    def to_server_timing(self):
+        """
+        Returns the phases as a Server-Timing header value.
+        """
+        return ', '.join(
+            '{};dur={:.2f}'.format(name, phase['duration'] * 1000)
+            for name, phase in self.phases.items()
+        )
+
+
+@contextmanager
+def measure(metrics, name):
+    """
+    Measures the enclosed block as phase name of metrics, if any.
+    """
+    if metrics is None:
+        yield
+    else:
+        with metrics.phase(name):
+            yield
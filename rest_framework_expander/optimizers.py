@@ -1,10 +1,178 @@
-from collections import OrderedDict
-from copy import deepcopy
+from collections import defaultdict, OrderedDict
+from copy import copy, deepcopy
+from functools import partial
+from multiprocessing.pool import ThreadPool
+from threading import Lock
+from django.contrib.contenttypes.fields import GenericForeignKey
+from django.contrib.contenttypes.models import ContentType
+from django.db import close_old_connections, connections
+from django.db.models import Prefetch
+from django.db.models.fields.related import ForeignRelatedObjectsDescriptor
+from django.db.models.query import prefetch_related_objects
 from django.utils import six
 from rest_framework.utils.serializer_helpers import BindingDict
 
 from rest_framework_expander import utils
 from rest_framework_expander.exceptions import ExpanderContextMissing
+from rest_framework_expander.serializers import ExpanderListSerializer
+from rest_framework_expander.settings import expander_settings
+
+
+_branch_pool = None
+_branch_pool_lock = Lock()
+
+
+def is_compilable(cls, name):
+    """
+    True if the compile method of cls accounts for the method name.
+
+    A class listing name in its compiled_methods applies the compiled plan in
+    its own method name, whichever class defines compile.
+    """
+    defining_class = utils.get_defining_class(cls, name)
+
+    if name in defining_class.__dict__.get('compiled_methods', ()):
+        return True
+
+    return issubclass(utils.get_defining_class(cls, 'compile'), defining_class)
+
+
+def get_branch_pool():
+    """
+    Returns the thread pool shared by concurrent optimizers, created once.
+    """
+    global _branch_pool
+
+    with _branch_pool_lock:
+        if _branch_pool is None:
+            _branch_pool = ThreadPool(expander_settings.CONCURRENT_WORKERS)
+
+    return _branch_pool
+
+
+def run_branch(task):
+    """
+    Runs task in a worker thread and releases the connections it opened.
+
+    Connections are thread local, so every worker queries on its own.
+    """
+    close_old_connections()
+
+    try:
+        return task()
+    finally:
+        close_old_connections()
+
+
+class ExpanderOptimizerPlan(object):
+    """
+    Immutable record of the optimizations of an optimizer tree.
+
+    Plans are shared between requests and can be applied to any queryset of
+    the model they were compiled for.
+    """
+
+    def __init__(self, select_related=(), prefetch_related=(), only=(), objects=()):
+        self.select_related = tuple(select_related)
+        self.prefetch_related = tuple(prefetch_related)
+        self.only = tuple(only)
+        self.objects = tuple(objects)
+
+    def __add__(self, other):
+        return ExpanderOptimizerPlan(
+            self.select_related + other.select_related,
+            self.prefetch_related + other.prefetch_related,
+            self.only + other.only,
+            self.objects + other.objects,
+        )
+
+    def to_optimized_queryset(self, queryset):
+        """
+        Applies the recorded queryset calls.
+        """
+        if self.select_related:
+            queryset = queryset.select_related(*self.select_related)
+
+        if self.prefetch_related:
+            queryset = queryset.prefetch_related(*[
+                lookup.to_prefetch() if isinstance(lookup, ExpanderPrefetch) else lookup
+                for lookup in self.prefetch_related
+            ])
+
+        if self.only:
+            queryset = queryset.only(*self.only)
+
+        return queryset
+
+    def to_prefetched_objects(self, objects, expander, metrics=None):
+        """
+        Prefetches the recorded lookups for evaluated objects.
+
+        Time and queries are attributed to the expansion paths of the lookups
+        in metrics.
+        """
+        paths = dict(
+            ('__'.join(utils.get_serializer_source_path(context.serializer)), path)
+            for path, context in six.iteritems(expander.index)
+        )
+
+        for lookup in self.prefetch_related:
+            name = lookup.lookup if isinstance(lookup, ExpanderPrefetch) else lookup
+            prefetch = lookup.to_prefetch() if isinstance(lookup, ExpanderPrefetch) else lookup
+
+            if metrics is None:
+                prefetch_related_objects(objects, [prefetch])
+                continue
+
+            metrics.enter_node(paths.get(name, tuple()))
+
+            try:
+                prefetch_related_objects(objects, [prefetch])
+            finally:
+                metrics.exit_node()
+
+        return objects
+
+    def to_optimized_objects(self, objects, expander, metrics=None):
+        """
+        Runs the recorded object optimizers against the expander of a request.
+
+        Time and queries are attributed to the optimized paths in metrics.
+        """
+        for path, template in self.objects:
+            optimizer = copy(template)
+            optimizer._expander = expander.index[path]
+
+            if metrics is None:
+                objects = optimizer.to_optimized_objects(objects)
+                continue
+
+            metrics.enter_node(path)
+
+            try:
+                objects = optimizer.to_optimized_objects(objects)
+            finally:
+                metrics.exit_node()
+
+        return objects
+
+
+class ExpanderPrefetch(object):
+    """
+    Prefetch lookup whose queryset is optimized by a compiled plan.
+    """
+
+    def __init__(self, lookup, model, plan):
+        self.lookup = lookup
+        self.model = model
+        self.plan = plan
+
+    def to_prefetch(self):
+        """
+        Returns a new Prefetch object for the lookup.
+        """
+        queryset = self.plan.to_optimized_queryset(self.model._default_manager.all())
+        return Prefetch(self.lookup, queryset=queryset)
 
 
 class ExpanderOptimizer(object):
@@ -37,6 +205,51 @@ class ExpanderOptimizer(object):
 
         return self._expander
 
+    def get_source_name(self, model):
+        """
+        Returns the verified model source name for the expander, or None.
+
+        The result is remembered by the expander plan across requests.
+        """
+        plan = self.expander.plan
+        key = ('source_name', model)
+
+        if plan is not None and key in plan.decisions:
+            return plan.decisions[key]
+
+        source_path = utils.get_serializer_source_path(self.expander.serializer)
+        source_name = utils.get_model_source_name(source_path, model)
+
+        if plan is not None:
+            plan.decisions[key] = source_name
+
+        return source_name
+
+    def get_template(self):
+        """
+        Returns an unbound copy of this optimizer for compiled plans.
+        """
+        template = copy(self)
+        template.parent = None
+        template.adapter = None
+        template.__dict__.pop('_expander', None)
+        return template
+
+    def compile(self, model):
+        """
+        Returns an ExpanderOptimizerPlan for model, or None if not compilable.
+
+        Optimizers overriding to_optimized_queryset must override compile,
+        optimizers overriding to_optimized_objects are run from a template.
+        """
+        if not is_compilable(type(self), 'to_optimized_queryset'):
+            return None
+
+        if utils.get_defining_class(type(self), 'to_optimized_objects') is ExpanderOptimizer:
+            return ExpanderOptimizerPlan()
+
+        return ExpanderOptimizerPlan(objects=[(self.expander.path, self.get_template())])
+
     def to_optimized_queryset(self, queryset):
         """
         Performs optimizations before the queryset has been evaluated.
@@ -52,6 +265,123 @@ class ExpanderOptimizer(object):
         return objects
 
 
+class ListExpanderOptimizer(ExpanderOptimizer):
+    """
+    Loads the previews of a nested list expansion for all objects in one query.
+    """
+
+    def __init__(self, preview_size=None, *args, **kwargs):
+        super(ListExpanderOptimizer, self).__init__(*args, **kwargs)
+        self.preview_size = preview_size
+
+    def get_preview_size(self):
+        """
+        Returns the maximum number of related objects per object.
+        """
+        if self.preview_size is not None:
+            return self.preview_size
+
+        return self.expander.serializer.parent.preview_size
+
+    def get_preview_queryset(self, descriptor, queryset, size):
+        """
+        Limits the queryset to size objects per parent, ranked by primary key.
+
+        Only reverse foreign keys without default ordering can be limited,
+        other relations are sliced after the query has been evaluated.
+        """
+        if not isinstance(descriptor, ForeignRelatedObjectsDescriptor) or queryset.ordered:
+            return queryset
+
+        field = descriptor.related.field
+        meta = field.model._meta
+        quote_name = connections[queryset.db].ops.quote_name
+
+        where = (
+            '(SELECT COUNT(*) FROM {table} preview '
+            'WHERE preview.{column} = {table}.{column} AND preview.{pk} < {table}.{pk}) < %s'
+        ).format(
+            table=quote_name(meta.db_table),
+            column=quote_name(field.column),
+            pk=quote_name(meta.pk.column),
+        )
+
+        return queryset.extra(where=[where], params=[size]).order_by('pk')
+
+    def to_optimized_objects(self, objects):
+        source_path = utils.get_serializer_source_path(self.expander.serializer.parent)
+        parents = utils.get_source_objects(objects, source_path[:-1])
+
+        if not parents:
+            return objects
+
+        source = source_path[-1]
+        size = self.get_preview_size()
+
+        manager = getattr(parents[0], source)
+        descriptor = getattr(type(parents[0]), source)
+        queryset = self.get_preview_queryset(descriptor, manager.model._default_manager.all(), size)
+
+        queryset, rel_obj_attr, instance_attr = manager.get_prefetch_queryset(parents, queryset)[:3]
+        parent_pks = dict((instance_attr(parent), parent.pk) for parent in parents)
+
+        for parent in parents:
+            self.expander.data[parent.pk] = list()
+
+        for rel_obj in queryset:
+            preview = self.expander.data[parent_pks[rel_obj_attr(rel_obj)]]
+
+            if len(preview) < size:
+                preview.append(rel_obj)
+
+        return objects
+
+
+class GenericExpanderOptimizer(ExpanderOptimizer):
+    """
+    Loads the targets of a generic foreign key with one query per content type.
+    """
+
+    def to_optimized_objects(self, objects):
+        source_path = utils.get_serializer_source_path(self.expander.serializer)
+        parents = utils.get_source_objects(objects, source_path[:-1])
+
+        if not parents:
+            return objects
+
+        field = utils.get_serializer_model_field(self.expander.serializer)
+        meta = field.model._meta
+        ct_attname = meta.get_field(field.ct_field).attname
+        fk_attname = meta.get_field(field.fk_field).attname
+
+        groups = defaultdict(list)
+
+        for parent in parents:
+            content_type_id = getattr(parent, ct_attname)
+
+            if content_type_id is not None and getattr(parent, fk_attname) is not None:
+                groups[content_type_id].append(parent)
+            else:
+                setattr(parent, field.cache_attr, None)
+
+        for content_type_id, group in six.iteritems(groups):
+            model = ContentType.objects.get_for_id(content_type_id).model_class()
+
+            if model is None:
+                for parent in group:
+                    setattr(parent, field.cache_attr, None)
+
+                continue
+
+            to_python = model._meta.pk.to_python
+            targets = model._default_manager.in_bulk(set(getattr(parent, fk_attname) for parent in group))
+
+            for parent in group:
+                setattr(parent, field.cache_attr, targets.get(to_python(getattr(parent, fk_attname))))
+
+        return objects
+
+
 class ExpanderOptimizerSetMeta(type):
     """
     Handles field declarations for ExpanderOptimizerSet.
@@ -87,7 +417,34 @@ class ExpanderOptimizerSet(ExpanderOptimizer):
     """
 
     def get_optimizers(self):
-        return deepcopy(self._declared_optimizers)
+        optimizers = deepcopy(self._declared_optimizers)
+
+        for name, expander in six.iteritems(self.expander.children):
+            if name not in optimizers:
+                optimizer = self.get_default_optimizer(expander)
+
+                if optimizer is not None:
+                    optimizers[name] = optimizer
+
+        return optimizers
+
+    def get_default_optimizer(self, expander):
+        """
+        Returns the optimizer for an expansion without declared optimizer, or None.
+        """
+        if isinstance(expander.serializer.parent, ExpanderListSerializer):
+            return ListExpanderOptimizer()
+
+        if isinstance(utils.get_serializer_model_field(expander.serializer), GenericForeignKey):
+            return GenericExpanderOptimizer()
+
+        return None
+
+    def get_metrics(self):
+        """
+        Returns the metrics of the request, or None.
+        """
+        return self.adapter.context.get('expander_metrics') if self.adapter else None
 
     @property
     def optimizers(self):
@@ -98,7 +455,56 @@ class ExpanderOptimizerSet(ExpanderOptimizer):
 
         return self._optimizers
 
+    def get_plan(self, model):
+        """
+        Returns the compiled plan for model, or None.
+
+        Plans are remembered per optimizer class by the expander plan, which
+        is shared by all requests with the same expansion.
+        """
+        plan = self.expander.plan
+
+        if plan is None:
+            return self.compile(model)
+
+        key = ('optimizer_plan', type(self), model)
+
+        if key not in plan.decisions:
+            plan.decisions[key] = self.compile(model)
+
+        return plan.decisions[key]
+
+    def compile(self, model):
+        if not is_compilable(type(self), 'to_optimized_queryset'):
+            return None
+
+        if not is_compilable(type(self), 'to_optimized_objects'):
+            return None
+
+        plan = ExpanderOptimizerPlan()
+
+        for name, optimizer in six.iteritems(self.optimizers):
+            if name in self.expander.children:
+                child_plan = optimizer.compile(model)
+
+                if child_plan is None:
+                    return None
+
+                plan += child_plan
+
+        return plan
+
     def to_optimized_queryset(self, queryset):
+        if self.parent is None and hasattr(queryset, 'model'):
+            self._plan = self.get_plan(queryset.model)
+
+            if self._plan is not None and self.get_metrics() is not None:
+                plan = ExpanderOptimizerPlan(self._plan.select_related, only=self._plan.only)
+                return plan.to_optimized_queryset(queryset)
+
+            if self._plan is not None:
+                return self._plan.to_optimized_queryset(queryset)
+
         for name, optimizer in six.iteritems(self.optimizers):
             if name in self.expander.children:
                 queryset = optimizer.to_optimized_queryset(queryset)
@@ -106,6 +512,14 @@ class ExpanderOptimizerSet(ExpanderOptimizer):
         return queryset
 
     def to_optimized_objects(self, objects):
+        if getattr(self, '_plan', None) is not None:
+            metrics = self.get_metrics()
+
+            if metrics is not None:
+                objects = self._plan.to_prefetched_objects(objects, self.expander, metrics)
+
+            return self._plan.to_optimized_objects(objects, self.expander, metrics)
+
         for name, optimizer in six.iteritems(self.optimizers):
             if name in self.expander.children:
                 objects = optimizer.to_optimized_objects(objects)
@@ -118,19 +532,22 @@ class PrefetchExpanderOptimizerSet(ExpanderOptimizerSet):
     ExpanderOptimizerSet which defaults to calling prefetch related.
     """
 
-    def get_optimizers(self):
-        optimizers = deepcopy(self._declared_optimizers)
+    def get_default_optimizer(self, expander):
+        optimizer = super(PrefetchExpanderOptimizerSet, self).get_default_optimizer(expander)
+        return optimizer if optimizer is not None else PrefetchExpanderOptimizerSet()
 
-        for name in self.expander.children.keys():
-            if name not in optimizers:
-                optimizers[name] = PrefetchExpanderOptimizerSet()
+    def compile(self, model):
+        plan = super(PrefetchExpanderOptimizerSet, self).compile(model)
+        source_name = self.get_source_name(model)
 
-        return optimizers
+        if plan is not None and source_name:
+            plan = ExpanderOptimizerPlan(prefetch_related=[source_name]) + plan
+
+        return plan
 
     def to_optimized_queryset(self, queryset):
         if hasattr(queryset, 'model'):
-            source_path = utils.get_serializer_source_path(self.expander.serializer)
-            source_name = utils.get_model_source_name(source_path, queryset.model)
+            source_name = self.get_source_name(queryset.model)
 
             if source_name:
                 queryset = queryset.prefetch_related(source_name)
@@ -143,21 +560,280 @@ class SelectExpanderOptimizerSet(ExpanderOptimizerSet):
     ExpanderOptimizerSet which defaults to calling select related.
     """
 
-    def get_optimizers(self):
-        optimizers = deepcopy(self._declared_optimizers)
+    def get_default_optimizer(self, expander):
+        optimizer = super(SelectExpanderOptimizerSet, self).get_default_optimizer(expander)
+        return optimizer if optimizer is not None else SelectExpanderOptimizerSet()
 
-        for name in self.expander.children.keys():
-            if name not in optimizers:
-                optimizers[name] = SelectExpanderOptimizerSet()
+    def compile(self, model):
+        plan = super(SelectExpanderOptimizerSet, self).compile(model)
+        source_name = self.get_source_name(model)
 
-        return optimizers
+        if plan is not None and source_name:
+            plan = ExpanderOptimizerPlan(select_related=[source_name]) + plan
+
+        return plan
 
     def to_optimized_queryset(self, queryset):
         if hasattr(queryset, 'model'):
-            source_path = utils.get_serializer_source_path(self.expander.serializer)
-            source_name = utils.get_model_source_name(source_path, queryset.model)
+            source_name = self.get_source_name(queryset.model)
 
             if source_name:
                 queryset = queryset.select_related(source_name)
 
         return super(SelectExpanderOptimizerSet, self).to_optimized_queryset(queryset)
+
+
+class RelationExpanderOptimizerSet(ExpanderOptimizerSet):
+    """
+    ExpanderOptimizerSet which picks select or prefetch related per relation.
+
+    Chains of foreign keys and one to one relations are joined with select
+    related. To many relations are prefetched with their own queryset, to
+    which the same rules apply for the expansions below them.
+    """
+
+    def get_default_optimizer(self, expander):
+        optimizer = super(RelationExpanderOptimizerSet, self).get_default_optimizer(expander)
+        return optimizer if optimizer is not None else RelationExpanderOptimizerSet()
+
+    def compile(self, model, depth=0):
+        """
+        Returns an ExpanderOptimizerPlan for model, or None if not compilable.
+
+        depth is the length of the source path of the serializer for model.
+        """
+        if not is_compilable(type(self), 'to_optimized_queryset'):
+            return None
+
+        if not is_compilable(type(self), 'to_optimized_objects'):
+            return None
+
+        source_path = utils.get_serializer_source_path(self.expander.serializer)
+        relations = utils.get_model_relations(source_path[depth:], model)
+
+        if relations is None:
+            return ExpanderOptimizerPlan()
+
+        if not relations:
+            plan = self.compile_children(model, depth)
+
+            if plan is not None and self.parent is None:
+                columns = self.get_columns(model, depth)
+
+                if columns is not None:
+                    plan += ExpanderOptimizerPlan(only=columns)
+
+            return plan
+
+        lookup = '__'.join(source_path[depth:])
+        field = relations[-1]
+
+        if utils.is_single_relation(field):
+            plan = self.compile_children(model, depth)
+            return ExpanderOptimizerPlan(select_related=[lookup]) + plan if plan is not None else None
+
+        if field.related_model is None:
+            return ExpanderOptimizerPlan(prefetch_related=[lookup])
+
+        plan = self.compile_children(field.related_model, len(source_path))
+
+        if plan is None:
+            return None
+
+        columns = self.get_columns(field.related_model, len(source_path))
+
+        if columns is not None:
+            if hasattr(field, 'object_id_field_name'):
+                columns.extend((field.object_id_field_name, field.content_type_field_name))
+            elif field.one_to_many:
+                columns.append(field.field.name)
+
+            plan += ExpanderOptimizerPlan(only=columns)
+
+        prefetch = ExpanderPrefetch(
+            lookup, field.related_model, ExpanderOptimizerPlan(plan.select_related, plan.prefetch_related, plan.only)
+        )
+
+        return ExpanderOptimizerPlan(prefetch_related=[prefetch], objects=plan.objects)
+
+    def compile_children(self, model, depth):
+        """
+        Returns the combined plan of the child optimizers, or None.
+
+        Object optimizers below to many relations are lifted into the plan of
+        the root, they run once the prefetched objects have been loaded.
+        """
+        plan = ExpanderOptimizerPlan()
+
+        for name, optimizer in six.iteritems(self.optimizers):
+            if name not in self.expander.children:
+                continue
+
+            if isinstance(optimizer, RelationExpanderOptimizerSet):
+                child_plan = optimizer.compile(model, depth)
+            else:
+                child_plan = optimizer.compile(model)
+
+            if child_plan is None:
+                return None
+
+            plan += child_plan
+
+        return plan
+
+    def get_columns(self, model, depth):
+        """
+        Returns the field names of model read by this expansion, or None.
+
+        Includes the fields of expansions joined below it, prefixed with their
+        lookup. depth is the length of the source path of the serializer for
+        model.
+        """
+        source_path = utils.get_serializer_source_path(self.expander.serializer)[depth:]
+        relations = utils.get_model_relations(source_path, model)
+
+        if relations is None:
+            return None
+
+        node_model = relations[-1].related_model if relations else model
+        columns = utils.get_serializer_columns(self.expander.serializer, node_model)
+
+        if columns is None:
+            return None
+
+        prefix = ''.join(source + '__' for source in source_path)
+        columns = [prefix + column for column in columns]
+
+        for name, optimizer in six.iteritems(self.optimizers):
+            if name not in self.expander.children:
+                continue
+
+            if isinstance(optimizer, RelationExpanderOptimizerSet):
+                child_path = utils.get_serializer_source_path(optimizer.expander.serializer)[depth:]
+                child_relations = utils.get_model_relations(child_path, model)
+
+                if child_relations and utils.is_single_relation(child_relations[-1]):
+                    child_columns = optimizer.get_columns(model, depth)
+
+                    if child_columns is None:
+                        return None
+
+                    columns.extend(child_columns)
+
+            elif not isinstance(optimizer, (ListExpanderOptimizer, GenericExpanderOptimizer)):
+                return None
+
+        return columns
+
+    def to_optimized_queryset(self, queryset):
+        if self.parent is not None and hasattr(queryset, 'model'):
+            source_path = utils.get_serializer_source_path(self.expander.serializer)
+            relations = utils.get_model_relations(source_path, queryset.model)
+
+            if relations:
+                lookup = '__'.join(source_path)
+
+                if all(utils.is_single_relation(field) for field in relations):
+                    queryset = queryset.select_related(lookup)
+                else:
+                    queryset = queryset.prefetch_related(lookup)
+
+        return super(RelationExpanderOptimizerSet, self).to_optimized_queryset(queryset)
+
+
+class ConcurrentRelationExpanderOptimizerSet(RelationExpanderOptimizerSet):
+    """
+    RelationExpanderOptimizerSet loading sibling branches on a thread pool.
+
+    Joins are applied to the queryset as usual. Prefetches are grouped into
+    branches by their first lookup segment and loaded concurrently once the
+    queryset has been evaluated, followed by the object optimizers, which
+    must work in place. Runs sequentially inside transactions and on in
+    memory databases, whose data other connections can not see, and while
+    metrics are recorded.
+    """
+    compiled_methods = ('to_optimized_queryset', 'to_optimized_objects')
+
+    def to_optimized_queryset(self, queryset):
+        if self.parent is None and hasattr(queryset, 'model'):
+            self._plan = self.get_plan(queryset.model)
+
+            if self._plan is not None:
+                plan = ExpanderOptimizerPlan(self._plan.select_related, only=self._plan.only)
+                return plan.to_optimized_queryset(queryset)
+
+        return super(ConcurrentRelationExpanderOptimizerSet, self).to_optimized_queryset(queryset)
+
+    def to_optimized_objects(self, objects):
+        plan = getattr(self, '_plan', None)
+
+        if plan is None or not objects or self.get_metrics() is not None:
+            return super(ConcurrentRelationExpanderOptimizerSet, self).to_optimized_objects(objects)
+
+        for obj in objects:
+            if not hasattr(obj, '_prefetched_objects_cache'):
+                obj._prefetched_objects_cache = dict()
+
+        concurrent = self.can_run_concurrently(objects[0]._state.db)
+
+        self.run_branches([
+            partial(self.prefetch_branch, objects, lookups)
+            for lookups in self.get_branches(plan)
+        ], concurrent)
+
+        self.run_branches([
+            partial(ExpanderOptimizerPlan(objects=[item]).to_optimized_objects, objects, self.expander)
+            for item in plan.objects
+        ], concurrent)
+
+        return objects
+
+    def get_branches(self, plan):
+        """
+        Returns the prefetch lookups of plan grouped by their first segment.
+        """
+        branches = OrderedDict()
+
+        for lookup in plan.prefetch_related:
+            name = lookup.lookup if isinstance(lookup, ExpanderPrefetch) else lookup
+            branches.setdefault(name.split('__')[0], list()).append(lookup)
+
+        return list(branches.values())
+
+    def prefetch_branch(self, objects, lookups):
+        """
+        Prefetches the lookups of one branch for objects.
+        """
+        prefetch_related_objects(objects, [
+            lookup.to_prefetch() if isinstance(lookup, ExpanderPrefetch) else lookup
+            for lookup in lookups
+        ])
+
+    def can_run_concurrently(self, alias):
+        """
+        True if other connections see the same data as the one for alias.
+        """
+        connection = connections[alias]
+
+        if connection.in_atomic_block:
+            return False
+
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db(connection.settings_dict['NAME']):
+            return False
+
+        return True
+
+    def run_branches(self, tasks, concurrent):
+        """
+        Runs tasks on the branch pool if concurrent, otherwise in order.
+        """
+        if not concurrent or len(tasks) < 2:
+            for task in tasks:
+                task()
+
+            return
+
+        results = [get_branch_pool().apply_async(run_branch, (task,)) for task in tasks]
+
+        for result in results:
+            result.get()
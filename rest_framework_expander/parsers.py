@@ -1,7 +1,8 @@
-from rest_framework.serializers import Serializer
+from rest_framework.serializers import ListSerializer, Serializer
 
 from rest_framework_expander.context import ExpanderContext
 from rest_framework_expander.exceptions import ExpanderFieldMissing, ExpanderDepthBreached
+from rest_framework_expander.plans import ExpanderPlan, ExpanderPlanCache
 from rest_framework_expander.settings import expander_settings
 
 
@@ -10,11 +11,13 @@ class ExpanderParser(object):
     Parses the expander query parameters.
     """
     expansion_key = expander_settings.EXPANSION_KEY
+    fields_key = expander_settings.FIELDS_KEY
     expansion_item_separator = expander_settings.EXPANSION_ITEM_SEPARATOR
     expansion_path_separator = expander_settings.EXPANSION_PATH_SEPARATOR
     fail_on_depth_breached = expander_settings.FAIL_ON_DEPTH_BREACHED
     fail_on_field_missing = expander_settings.FAIL_ON_FIELD_MISSING
     max_depth = expander_settings.MAX_DEPTH
+    plan_cache = ExpanderPlanCache(expander_settings.PLAN_CACHE_SIZE)
 
     def __init__(self, adapter):
         self.adapter = adapter
@@ -23,13 +26,36 @@ class ExpanderParser(object):
         """
         Returns the root expander context by parsing the query parameters.
         """
-        root = ExpanderContext(None, None)
+        serializer = self.adapter.object_serializer
+        paths = self.get_paths()
+        field_paths = self.get_field_paths()
 
+        key = (type(self), type(serializer), paths, field_paths)
+        plan = self.plan_cache.get(key)
+
+        if plan is None:
+            plan = self.get_plan(paths)
+            self.apply_field_paths(plan, field_paths)
+            self.plan_cache.set(key, plan)
+
+        if plan.missing and self.fail_on_field_missing:
+            raise ExpanderFieldMissing()
+
+        root = ExpanderContext(None, serializer, plan=plan)
+        self.build_context(root, plan)
+        return root
+
+    def get_paths(self):
+        """
+        Returns the normalized expansion paths from the query parameters.
+        """
         request = self.adapter.context['request']
         param = request.query_params.get(self.expansion_key)
 
         if not param:
-            return root
+            return tuple()
+
+        paths = set()
 
         for item in param.split(self.expansion_item_separator):
             parts = item.split(self.expansion_path_separator, self.max_depth + 1)
@@ -40,14 +66,84 @@ class ExpanderParser(object):
                 else:
                     parts = parts[:self.max_depth]
 
+            paths.add(tuple(parts))
+
+        return tuple(sorted(paths))
+
+    def get_field_paths(self):
+        """
+        Returns the normalized sparse fieldset paths from the query parameters.
+
+        A path names a field below at most max_depth expansions.
+        """
+        request = self.adapter.context['request']
+        param = request.query_params.get(self.fields_key)
+
+        if not param:
+            return tuple()
+
+        paths = set()
+
+        for item in param.split(self.expansion_item_separator):
+            if not item:
+                continue
+
+            parts = item.split(self.expansion_path_separator, self.max_depth + 1)
+
+            if self.max_depth + 1 < len(parts):
+                if self.fail_on_depth_breached:
+                    raise ExpanderDepthBreached()
+                else:
+                    parts = parts[:self.max_depth + 1]
+
+            paths.add(tuple(parts))
+
+        return tuple(sorted(paths))
+
+    def apply_field_paths(self, plan, field_paths):
+        """
+        Limits the fields of the plan nodes named by the field paths.
+
+        A node lists the first parts of the paths reaching it, paths leading
+        below collapsed fields are ignored. Expansions of fields which are
+        not listed are removed.
+        """
+        nodes = dict()
+
+        for parts in field_paths:
+            node = plan
+
+            for index, part in enumerate(parts):
+                nodes.setdefault(id(node), (node, set()))[1].add(part)
+
+                if index + 1 == len(parts) or part not in node.children:
+                    break
+
+                node = node.children[part]
+
+        for node, fields in nodes.values():
+            node.fields = frozenset(fields)
+
+            for field_name in list(node.children):
+                if field_name not in fields:
+                    del node.children[field_name]
+
+    def get_plan(self, paths):
+        """
+        Returns a new plan containing the valid parts of the expansion paths.
+        """
+        root = ExpanderPlan()
+
+        for parts in paths:
             serializer = self.adapter.object_serializer
             node = root
 
             for part in parts:
-                if not isinstance(serializer.fields.get(part), Serializer):
+                if not isinstance(serializer.fields.get(part), (ListSerializer, Serializer)):
                     if self.fail_on_field_missing:
                         raise ExpanderFieldMissing()
                     else:
+                        root.missing = True
                         break
 
                 serializer = serializer.fields[part]
@@ -56,8 +152,17 @@ class ExpanderParser(object):
                     serializer = serializer.child
 
                 if part not in node.children:
-                    node.children[part] = ExpanderContext(node, serializer)
+                    node.children[part] = ExpanderPlan()
 
                 node = node.children[part]
 
         return root
+
+    def build_context(self, context, plan):
+        """
+        Adds an expander context to context for every child of plan.
+        """
+        for field_name, child_plan in plan.children.items():
+            child = ExpanderContext(context, None, field_name=field_name, plan=child_plan)
+            context.children[field_name] = child
+            self.build_context(child, child_plan)
@@ -0,0 +1,29 @@
+from rest_framework_expander.caches import LRUCache
+
+
+class ExpanderPlan(object):
+    """
+    Contains the request independent parts of an expander context.
+    """
+
+    def __init__(self):
+        self.children = dict()
+        self.decisions = dict()
+        self.fields = None
+        self.missing = False
+
+    def copy(self):
+        """
+        Returns a copy of this plan without the remembered decisions.
+        """
+        plan = ExpanderPlan()
+        plan.children = self.children
+        plan.fields = self.fields
+        plan.missing = self.missing
+        return plan
+
+
+class ExpanderPlanCache(LRUCache):
+    """
+    Thread safe LRU cache of expander plans shared between requests.
+    """
@@ -1,6 +1,8 @@
-from django.apps import apps
+from operator import attrgetter
+
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
+from django.db.models.fields import FieldDoesNotExist
 from django.db.models.fields.related import ForeignKey
 
 
@@ -8,28 +10,154 @@ class PKObject(object):
     """
     Mock object for partial instances.
 
-    Provides primary key and model meta.
+    Provides primary key and model meta for the target of a relation field
+    of parent. Use get_pk_object_class for a subclass bound to a model and
+    its from_pk for creating instances without a parent.
+    """
+    __slots__ = ('pk',)
+    _meta = None
+
+    def __new__(cls, parent, field_name):
+        accessor = get_accessor(type(parent), field_name)
+
+        if accessor is None:
+            raise TypeError("Unsupported field: {}".format(field_name))
+
+        pk_object_class = accessor.get_pk_object_class(parent)
+
+        if pk_object_class is None:
+            raise TypeError("Unsupported target of field: {}".format(field_name))
+
+        return pk_object_class.from_pk(accessor.get_pk(parent))
+
+    @classmethod
+    def from_pk(cls, pk):
+        """
+        Returns an instance of cls for pk.
+        """
+        obj = object.__new__(cls)
+        obj.pk = pk
+        return obj
+
+
+class ForeignKeyAccessor(object):
+    """
+    Returns a PKObject for the target of a foreign key, or None.
     """
+    __slots__ = ('attname', 'pk_object_class')
+
+    def __init__(self, field):
+        self.attname = field.attname
+        self.pk_object_class = get_pk_object_class(field.rel.to)
+
+    def get_pk(self, parent):
+        return getattr(parent, self.attname)
+
+    def get_pk_object_class(self, parent):
+        return self.pk_object_class
+
+    def __call__(self, parent):
+        pk = getattr(parent, self.attname)
+        return self.pk_object_class.from_pk(pk) if pk is not None else None
+
+
+class GenericForeignKeyAccessor(object):
+    """
+    Returns a PKObject for the target of a generic foreign key, or None.
+    """
+    __slots__ = ('ct_attname', 'fk_attname', 'pk_object_classes')
+
+    def __init__(self, model, field):
+        self.ct_attname = model._meta.get_field(field.ct_field).attname
+        self.fk_attname = model._meta.get_field(field.fk_field).attname
+        self.pk_object_classes = dict()
+
+    def get_content_type_class(self, content_type_id):
+        """
+        Returns the PKObject subclass for a content type, resolved once.
 
-    def __init__(self, parent, field_name):
-        field = parent._meta.get_field(field_name)
+        None is returned for stale content types without a model.
+        """
+        try:
+            return self.pk_object_classes[content_type_id]
+        except KeyError:
+            pass
 
-        if isinstance(field, ForeignKey):
-            target_field = field
-            target_meta = field.rel.to._meta
+        try:
+            model = ContentType.objects.get_for_id(content_type_id).model_class()
+        except ContentType.DoesNotExist:
+            model = None
+
+        pk_object_class = get_pk_object_class(model) if model is not None else None
+        self.pk_object_classes[content_type_id] = pk_object_class
+        return pk_object_class
+
+    def get_pk(self, parent):
+        return getattr(parent, self.fk_attname)
+
+    def get_pk_object_class(self, parent):
+        content_type_id = getattr(parent, self.ct_attname)
+        return self.get_content_type_class(content_type_id) if content_type_id is not None else None
+
+    def __call__(self, parent):
+        pk = getattr(parent, self.fk_attname)
+        pk_object_class = self.get_pk_object_class(parent) if pk is not None else None
+
+        if pk_object_class is None:
+            return None
+
+        return pk_object_class.from_pk(pk)
+
+
+_pk_object_classes = dict()
+_accessors = dict()
+
+
+def get_pk_object_class(model):
+    """
+    Returns the PKObject subclass for model, creating it once.
+    """
+    try:
+        return _pk_object_classes[model]
+    except KeyError:
+        pass
+
+    meta = model._meta
+    attrs = {'__slots__': (), '_meta': meta}
+
+    if meta.pk.name != 'pk':
+        attrs[meta.pk.name] = property(attrgetter('pk'))
+
+    pk_object_class = type(str('{}PKObject'.format(meta.object_name)), (PKObject,), attrs)
+    _pk_object_classes[model] = pk_object_class
+    return pk_object_class
+
+
+def get_accessor(model, field_name):
+    """
+    Returns the relation accessor for a field of model, or None.
+
+    Accessors are built once per model and field name. None marks fields
+    which are not supported relations.
+    """
+    key = (model, field_name)
 
-        elif isinstance(field, GenericForeignKey):
-            content_type_field = parent._meta.get_field(field.ct_field)
-            content_type_id = getattr(parent, content_type_field.attname)
-            content_type = ContentType.objects.get_for_id(content_type_id)
-            target_model = apps.get_model(content_type.app_label, content_type.model)
+    try:
+        return _accessors[key]
+    except KeyError:
+        pass
 
-            target_field = parent._meta.get_field(field.fk_field)
-            target_meta = target_model._meta
+    try:
+        field = model._meta.get_field(field_name)
+    except (AttributeError, FieldDoesNotExist):
+        field = None
 
-        else:
-            raise TypeError("Unsupported type: {}".format(type(field).__name__))
+    if isinstance(field, ForeignKey):
+        accessor = ForeignKeyAccessor(field)
+    elif isinstance(field, GenericForeignKey):
+        accessor = GenericForeignKeyAccessor(model, field)
+    else:
+        accessor = None
 
-        self._meta = target_meta
-        self.pk = getattr(parent, target_field.attname)
-        setattr(self, self._meta.pk.name, self.pk)
+    _accessors[key] = accessor
+    return accessor
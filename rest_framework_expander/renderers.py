@@ -0,0 +1,35 @@
+from functools import partial
+from rest_framework.renderers import JSONRenderer
+
+from rest_framework_expander.fragments import FragmentJSONEncoder, splice_fragments
+
+
+class ExpanderSideloadJSONRenderer(JSONRenderer):
+    """
+    JSON renderer selecting the side-loaded output mode of expander views.
+    """
+    media_type = 'application/vnd.expander.sideload+json'
+    format = 'sideload'
+    sideload = True
+
+
+class ExpanderFragmentJSONRenderer(JSONRenderer):
+    """
+    JSON renderer splicing pre-encoded fragments into its output.
+
+    Selects fragment representations for collapsed serializers of expander
+    views, otherwise renders like JSONRenderer.
+    """
+    encoder_class = FragmentJSONEncoder
+    fragments = True
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        fragments = list()
+        self.encoder_class = partial(type(self).encoder_class, fragments=fragments)
+
+        try:
+            content = super(ExpanderFragmentJSONRenderer, self).render(data, accepted_media_type, renderer_context)
+        finally:
+            del self.encoder_class
+
+        return splice_fragments(content, fragments)
@@ -1,20 +1,44 @@
 from collections import OrderedDict
-from django.db.models.fields import FieldDoesNotExist
 from django.utils import six
 from rest_framework.fields import SkipField
+from rest_framework.relations import HyperlinkedIdentityField
 from rest_framework.reverse import reverse
-from rest_framework.serializers import Serializer
+from rest_framework.serializers import ListSerializer, Serializer
 from rest_framework.settings import import_from_string
 
+from rest_framework_expander import caches
 from rest_framework_expander.context import ExpanderContext
-from rest_framework_expander.relations import PKObject
+from rest_framework_expander.fragments import ExpanderFragmentCache, encode_fragment
+from rest_framework_expander.relations import get_accessor
 from rest_framework_expander.settings import expander_settings
+from rest_framework_expander.templates import (
+    ExpanderFieldTemplate, ExpanderFieldTemplateCache, is_templatable_serializer
+)
+from rest_framework_expander.utils import get_serializer_field_path, reset_serializer_paths
+
+
+child_classes = dict()
+
+
+def get_child_class(child_class):
+    """
+    Returns child_class, imported once if given as a dotted path.
+    """
+    if not isinstance(child_class, six.string_types):
+        return child_class
+
+    if child_class not in child_classes:
+        child_classes[child_class] = import_from_string(child_class, None)
+
+    return child_classes[child_class]
 
 
 class ExpanderSerializerMixin(object):
     """
     Provides both collapsed and expanded representations.
     """
+    field_templates = ExpanderFieldTemplateCache() if expander_settings.FIELD_TEMPLATES else None
+    fragment_cache = ExpanderFragmentCache(expander_settings.FRAGMENT_CACHE_SIZE)
 
     def __init__(self, *args, **kwargs):
         expanded = kwargs.pop('expanded', None)
@@ -24,6 +48,46 @@ class ExpanderSerializerMixin(object):
 
         super(ExpanderSerializerMixin, self).__init__(*args, **kwargs)
 
+    def bind(self, field_name, parent):
+        super(ExpanderSerializerMixin, self).bind(field_name, parent)
+        reset_serializer_paths(self)
+
+    @property
+    def field_template(self):
+        """
+        The field template shared between instances of this class, or None.
+        """
+        if self.field_templates is None:
+            return None
+
+        serializer_class = type(self)
+        template = self.field_templates.get(serializer_class)
+
+        if template is None:
+            template = self.get_field_template() if is_templatable_serializer(serializer_class) else False
+            template = self.field_templates.set(serializer_class, template)
+
+        return template or None
+
+    def get_field_template(self):
+        """
+        Returns a template of the fields built for this class.
+        """
+        fields = super(ExpanderSerializerMixin, self).get_fields()
+        meta = getattr(self, 'Meta', None)
+        field_names = getattr(meta, 'collapsed_fields', expander_settings.COLLAPSED_FIELDS)
+        collapsed_field_names = tuple(field_name for field_name in field_names if field_name in fields)
+
+        return ExpanderFieldTemplate(fields, collapsed_field_names)
+
+    def get_fields(self):
+        template = self.field_template
+
+        if template is None:
+            return super(ExpanderSerializerMixin, self).get_fields()
+
+        return template.get_fields()
+
     @property
     def expander(self):
         """
@@ -58,8 +122,14 @@ class ExpanderSerializerMixin(object):
         Dictionary containing the fields of the collapsed representation.
         """
         if not hasattr(self, '_collapsed_fields'):
-            meta = getattr(self, 'Meta', None)
-            field_names = getattr(meta, 'collapsed_fields', expander_settings.COLLAPSED_FIELDS)
+            template = self.field_template
+
+            if template is not None:
+                field_names = template.collapsed_field_names
+            else:
+                meta = getattr(self, 'Meta', None)
+                field_names = getattr(meta, 'collapsed_fields', expander_settings.COLLAPSED_FIELDS)
+
             self._collapsed_fields = OrderedDict()
 
             for field_name in field_names:
@@ -68,6 +138,94 @@ class ExpanderSerializerMixin(object):
 
         return self._collapsed_fields
 
+    @property
+    def expanded_fields(self):
+        """
+        Dictionary containing the fields of the expanded representation.
+
+        Limited to the sparse fieldset of the expander context, if any.
+        """
+        if not hasattr(self, '_expanded_fields'):
+            field_names = self.expander.fields if self.expander is not None else None
+
+            if field_names is None:
+                self._expanded_fields = self.fields
+            else:
+                self._expanded_fields = OrderedDict(
+                    (field_name, field) for field_name, field in self.fields.items() if field_name in field_names
+                )
+
+        return self._expanded_fields
+
+    @property
+    def representation_cache(self):
+        """
+        The cache shared between requests for this serializer, or None.
+
+        Only serializers with cache_representations set in their Meta are
+        cached, and expanded representations only without nested expansions.
+        """
+        meta = getattr(self, 'Meta', None)
+
+        if not getattr(meta, 'cache_representations', False):
+            return None
+
+        if self.expanded and self.expander is not None and self.expander.children:
+            return None
+
+        if not self.expanded and self.is_fragmented():
+            return None
+
+        return caches.representation_cache
+
+    @property
+    def fragmentable(self):
+        """
+        True if the collapsed representation only depends on the primary key.
+        """
+        if not hasattr(self, '_fragmentable'):
+            model = getattr(getattr(self, 'Meta', None), 'model', None)
+            pk_names = ('pk', model._meta.pk.name) if model is not None else ('pk',)
+            sources = [
+                field.lookup_field if isinstance(field, HyperlinkedIdentityField) else field.source
+                for field in self.collapsed_fields.values()
+            ]
+
+            self._fragmentable = bool(sources) and all(source in pk_names for source in sources)
+
+        return self._fragmentable
+
+    def is_fragmented(self):
+        """
+        True if the collapsed representation is rendered as a JSON fragment.
+
+        Selected by renderers with fragments set, for fragmentable serializers.
+        """
+        return self.context.get('expander_fragments', False) and self.fragmentable
+
+    @property
+    def representation_signature(self):
+        """
+        Identifies the representations rendered by this serializer.
+
+        Serializers with equal signatures render equal representations of an
+        object, so they share the entries of the per-request identity map.
+        """
+        if not hasattr(self, '_representation_signature'):
+            self._representation_signature = self.get_representation_signature()
+
+        return self._representation_signature
+
+    def get_representation_signature(self):
+        """
+        Returns the serializer class, mode, field names and expansion subtree.
+        """
+        if not self.expanded:
+            return (type(self), False, tuple(self.collapsed_fields.keys()), None)
+
+        subtree = self.expander.signature if self.expander is not None else None
+        return (type(self), True, tuple(self.expanded_fields.keys()), subtree)
+
     def get_attribute(self, instance):
         if self.expanded:
             return self.get_expanded_attribute(instance)
@@ -84,26 +242,110 @@ class ExpanderSerializerMixin(object):
         """
         Returns attribute for the collapsed representation.
         """
-        try:
-            obj = PKObject(instance, self.field_name)
-            return obj if obj.pk is not None else None
-        except (FieldDoesNotExist, TypeError):
+        accessor = get_accessor(type(instance), self.field_name)
+
+        if accessor is None:
             return super(ExpanderSerializerMixin, self).get_attribute(instance)
 
+        return accessor(instance)
+
+    def is_sideloaded(self):
+        """
+        True if the expanded representation goes to the included objects.
+
+        Only nested serializers are side-loaded, root objects stay inline.
+        """
+        if 'expander_included' not in self.context or not self.expanded:
+            return False
+
+        parent = self.parent
+
+        if isinstance(parent, ListSerializer):
+            parent = parent.parent
+
+        return parent is not None
+
+    def get_included_type(self):
+        """
+        Returns the key grouping the included objects of this serializer.
+
+        Defaults to the label of Meta.model, or the class name without a model.
+        """
+        meta = getattr(self, 'Meta', None)
+        included_type = getattr(meta, 'included_type', None)
+        model = getattr(meta, 'model', None)
+
+        if included_type is None and model is not None:
+            included_type = '{}.{}'.format(model._meta.app_label, model._meta.model_name)
+
+        if included_type is None:
+            included_type = type(self).__name__
+
+        return included_type
+
+    def include(self, instance, representation):
+        """
+        Adds representation to the included objects, merging duplicates.
+        """
+        included = self.context['expander_included']
+        objects = included.setdefault(self.get_included_type(), OrderedDict())
+        key = six.text_type(instance.pk)
+
+        if key in objects and objects[key] is not representation:
+            merged = OrderedDict(objects[key])
+            merged.update(representation)
+            representation = merged
+
+        objects[key] = representation
+
     def to_representation(self, instance):
+        metrics = self.context.get('expander_metrics')
+
+        if metrics is not None:
+            metrics.enter_node(get_serializer_field_path(self))['rows'] += 1
+
+        try:
+            representation = self.to_cached_representation(instance, metrics)
+
+            if self.is_sideloaded():
+                self.include(instance, representation)
+                representation = self.to_collapsed_representation(instance)
+
+            return representation
+        finally:
+            if metrics is not None:
+                metrics.exit_node()
+
+    def to_cached_representation(self, instance, metrics):
+        """
+        Returns the representation of instance through the caches.
+        """
         if 'representations' not in self.context:
             self.context['representations'] = dict()
 
         cache = self.context['representations']
-        key = (self, instance.pk)
+        key = (self.representation_signature, instance.pk)
 
         if key in cache:
+            if metrics is not None:
+                metrics.record_cache_hit()
+
             return cache[key]
 
-        if self.expanded:
-            representation = self.to_expanded_representation(instance)
-        else:
-            representation = self.to_collapsed_representation(instance)
+        shared_cache = self.representation_cache
+        representation = shared_cache.get(self, instance) if shared_cache else None
+
+        if representation is not None and metrics is not None:
+            metrics.record_cache_hit()
+
+        if representation is None:
+            if self.expanded:
+                representation = self.to_expanded_representation(instance)
+            else:
+                representation = self.to_collapsed_representation(instance)
+
+            if shared_cache:
+                shared_cache.set(self, instance, representation)
 
         cache[key] = representation
         return representation
@@ -112,14 +354,47 @@ class ExpanderSerializerMixin(object):
         """
         Returns the expanded representation.
         """
-        return super(ExpanderSerializerMixin, self).to_representation(instance)
+        if self.expanded_fields is self.fields:
+            return super(ExpanderSerializerMixin, self).to_representation(instance)
+
+        return self.to_fields_representation(instance, self.expanded_fields)
 
     def to_collapsed_representation(self, instance):
         """
         Returns the collapsed representation.
         """
+        if self.is_fragmented():
+            return self.to_fragment_representation(instance)
+
+        return self.to_fields_representation(instance, self.collapsed_fields)
+
+    def to_fragment_representation(self, instance):
+        """
+        Returns the collapsed representation as a JSON fragment.
+
+        Fragments are shared between requests with the same URL prefix,
+        version and format suffix.
+        """
+        if 'expander_fragment_scope' not in self.context:
+            request = self.context.get('request')
+            scope = (request.build_absolute_uri('/'), getattr(request, 'version', None)) if request is not None else None
+            self.context['expander_fragment_scope'] = (scope, self.context.get('format'))
+
+        key = (type(self), self.context['expander_fragment_scope'], instance.pk)
+        fragment = self.fragment_cache.get(key)
+
+        if fragment is None:
+            fragment = encode_fragment(self.to_fields_representation(instance, self.collapsed_fields))
+            self.fragment_cache.set(key, fragment)
+
+        return fragment
+
+    def to_fields_representation(self, instance, fields):
+        """
+        Returns the representation of instance limited to fields.
+        """
         ret = OrderedDict()
-        fields = [field for field in self.collapsed_fields.values() if not field.write_only]
+        fields = [field for field in fields.values() if not field.write_only]
 
         for field in fields:
             try:
@@ -142,6 +417,7 @@ class ExpanderListSerializer(ExpanderSerializerMixin, Serializer):
 
     def __init__(self, child_class, view_name, *args, **kwargs):
         self.view_name = view_name
+        self.preview_size = kwargs.pop('preview_size', expander_settings.LIST_PREVIEW_SIZE)
 
         kwargs['read_only'] = True
         kwargs['source'] = '*'
@@ -153,11 +429,7 @@ class ExpanderListSerializer(ExpanderSerializerMixin, Serializer):
     def child(self):
         if not hasattr(self, '_child'):
             child_class, args, kwargs = self._child_specification
-
-            if six.text_type(child_class):
-                child_class = import_from_string(child_class, None)
-
-            self._child = child_class(*args, **kwargs)
+            self._child = get_child_class(child_class)(*args, **kwargs)
 
         return self._child
 
@@ -179,6 +451,13 @@ class ExpanderListSerializer(ExpanderSerializerMixin, Serializer):
     def get_collapsed_attribute(self, instance):
         return instance
 
+    def get_representation_signature(self):
+        signature = super(ExpanderListSerializer, self).get_representation_signature()
+        return signature + (type(self.parent), self.source, self.view_name, self.preview_size, type(self.child))
+
+    def to_representation(self, instance):
+        return self.to_cached_representation(instance, self.context.get('expander_metrics'))
+
     def get_url(self, instance):
         return reverse(self.view_name, (instance.pk,), request=self.context['request'])
 
@@ -186,7 +465,7 @@ class ExpanderListSerializer(ExpanderSerializerMixin, Serializer):
         try:
             objects = self.expander.data[instance.pk]
         except (AttributeError, KeyError):
-            objects = getattr(instance, self.source).all()[:3]
+            objects = getattr(instance, self.source).all()[:self.preview_size]
 
         return OrderedDict((
             ('url', self.get_url(instance)),
@@ -212,16 +491,13 @@ class ExpanderProxySerializer(Serializer):
     def child(self):
         if not hasattr(self, '_child'):
             child_class, args, kwargs = self._child_specification
-
-            if six.text_type(child_class):
-                child_class = import_from_string(child_class, None)
-
-            self._child = child_class(*args, **kwargs)
+            self._child = get_child_class(child_class)(*args, **kwargs)
 
         return self._child
 
     def bind(self, field_name, parent):
         super(ExpanderProxySerializer, self).bind(field_name, parent)
+        reset_serializer_paths(self)
         self.child.bind(field_name, parent)
 
     @property
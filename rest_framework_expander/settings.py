@@ -1,4 +1,5 @@
 from django.conf import settings
+from django.test.signals import setting_changed
 from rest_framework.settings import APISettings
 
 
@@ -6,23 +7,60 @@ USER_SETTINGS = getattr(settings, 'REST_FRAMEWORK_EXPANDER', dict())
 
 DEFAULTS = {
     'COLLAPSED_FIELDS': ('id', 'url'),
+    'CONCURRENT_WORKERS': 4,
+    'COST_RELATION_FANOUT': 10,
+    'COST_UNPAGINATED_ROWS': 1000,
     'DEFAULT_EXPANDED': True,
     'DEFAULT_ADAPTER_CLASS': 'rest_framework_expander.adapters.ExpanderAdapterStrategy',
+    'DEFAULT_COST_ESTIMATOR_CLASS': 'rest_framework_expander.costs.ExpanderCostEstimator',
     'DEFAULT_PARSER_CLASS': 'rest_framework_expander.parsers.ExpanderParser',
-    'DEFAULT_OPTIMIZER_CLASS': 'rest_framework_expander.optimizers.PrefetchExpanderOptimizerSet',
+    'DEFAULT_OPTIMIZER_CLASS': 'rest_framework_expander.optimizers.RelationExpanderOptimizerSet',
     'EXPANSION_KEY': 'expand',
     'EXPANSION_ITEM_SEPARATOR': ',',
     'EXPANSION_PATH_SEPARATOR': '.',
+    'FAIL_ON_COST_EXCEEDED': False,
     'FAIL_ON_DEPTH_BREACHED': False,
     'FAIL_ON_FIELD_MISSING': False,
+    'FIELDS_KEY': 'fields',
+    'FIELD_TEMPLATES': True,
+    'FRAGMENT_CACHE_SIZE': 10000,
+    'LIST_PREVIEW_SIZE': 3,
+    'MAX_COST': None,
     'MAX_DEPTH': 1,
+    'METRICS': False,
+    'METRICS_SERVER_TIMING': False,
+    'PLAN_CACHE_SIZE': 256,
+    'REPRESENTATION_CACHE': None,
+    'REPRESENTATION_CACHE_TIMEOUT': 300,
+    'RESPONSE_CACHE': None,
+    'RESPONSE_CACHE_TIMEOUT': None,
+    'SIDELOAD_KEY': 'sideload',
+    'STREAM_CHUNK_SIZE': 500,
+    'WARM_UP': False,
 }
 
 IMPORT_STRINGS = (
     'DEFAULT_ADAPTER_CLASS',
+    'DEFAULT_COST_ESTIMATOR_CLASS',
     'DEFAULT_PARSER_CLASS',
     'DEFAULT_OPTIMIZER_CLASS',
 )
 
 
 expander_settings = APISettings(USER_SETTINGS, DEFAULTS, IMPORT_STRINGS)
+
+
+def reload_expander_settings(*args, **kwargs):
+    """
+    Signal receiver applying changes of the expander settings, e.g. in tests.
+    """
+    if kwargs['setting'] != 'REST_FRAMEWORK_EXPANDER':
+        return
+
+    expander_settings._user_settings = kwargs['value'] or dict()
+
+    for name in DEFAULTS:
+        expander_settings.__dict__.pop(name, None)
+
+
+setting_changed.connect(reload_expander_settings)
@@ -0,0 +1,106 @@
+import copy
+
+from collections import OrderedDict
+from threading import Lock
+
+from rest_framework_expander.utils import get_defining_class
+
+
+FIELD_BUILDING_METHODS = (
+    'get_fields',
+    'get_field_names',
+    'get_default_field_names',
+    'get_extra_kwargs',
+    'get_uniqueness_extra_kwargs',
+    'include_extra_kwargs',
+    'build_field',
+    'build_standard_field',
+    'build_relational_field',
+    'build_nested_field',
+    'build_property_field',
+    'build_url_field',
+    'build_unknown_field',
+)
+
+TEMPLATABLE_MODULES = (
+    'rest_framework.serializers',
+    'rest_framework_expander.serializers',
+)
+
+
+def is_templatable_serializer(serializer_class):
+    """
+    True if the fields of serializer_class only depend on the class.
+
+    Serializers overriding how fields are built may depend on the request.
+    """
+    for name in FIELD_BUILDING_METHODS:
+        klass = get_defining_class(serializer_class, name)
+
+        if klass is not None and klass.__module__ not in TEMPLATABLE_MODULES:
+            return False
+
+    return True
+
+
+def clone_field(field):
+    """
+    Returns an unbound copy of a template field.
+
+    Validators are copied as well since some keep state while validating.
+    """
+    clone = copy.deepcopy(field)
+
+    if 'validators' in field._kwargs:
+        clone.validators = [copy.copy(validator) for validator in clone.validators]
+
+    return clone
+
+
+class ExpanderFieldTemplate(object):
+    """
+    Contains the request independent parts of the fields of a serializer class.
+    """
+
+    def __init__(self, fields, collapsed_field_names):
+        self.fields = fields
+        self.collapsed_field_names = collapsed_field_names
+
+    def get_fields(self):
+        """
+        Returns unbound copies of the template fields.
+        """
+        return OrderedDict((field_name, clone_field(field)) for field_name, field in self.fields.items())
+
+
+class ExpanderFieldTemplateCache(object):
+    """
+    Thread safe cache of field templates by serializer class.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._templates = dict()
+
+    def __len__(self):
+        return len(self._templates)
+
+    def get(self, serializer_class):
+        """
+        Returns the cached template for serializer_class, or None.
+        """
+        return self._templates.get(serializer_class)
+
+    def set(self, serializer_class, template):
+        """
+        Caches template for serializer_class, keeping an existing template.
+        """
+        with self._lock:
+            return self._templates.setdefault(serializer_class, template)
+
+    def clear(self):
+        """
+        Removes all templates.
+        """
+        with self._lock:
+            self._templates.clear()
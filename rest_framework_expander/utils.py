@@ -1,24 +1,46 @@
+from collections import OrderedDict
+from django.contrib.contenttypes.fields import GenericForeignKey
 from django.db.models.fields import FieldDoesNotExist
 from django.db.models.fields.related import ForeignKey
+from django.db.models.manager import BaseManager
+from rest_framework.relations import HyperlinkedIdentityField
+
+
+def get_defining_class(cls, name):
+    """
+    Returns the first class in the MRO of cls defining attribute name, or None.
+    """
+    for klass in cls.__mro__:
+        if name in klass.__dict__:
+            return klass
 
 
 def get_serializer_path(serializer, attribute):
     """
     Returns all values of attribute from the root serializer to serializer.
+
+    Paths are remembered by each serializer until it is bound again.
     """
-    path = list()
-    current = serializer
+    paths = serializer.__dict__.setdefault('_serializer_paths', dict())
 
-    while current:
-        value = getattr(current, attribute, None)
+    if attribute not in paths:
+        parent = serializer.parent
+        path = get_serializer_path(parent, attribute) if parent is not None else tuple()
+        value = getattr(serializer, attribute, None)
 
-        if value and not hasattr(current.parent, 'child'):
-            path.append(value)
+        if value and not hasattr(parent, 'child'):
+            path += (value,)
 
-        current = current.parent
+        paths[attribute] = path
 
-    path.reverse()
-    return path
+    return paths[attribute]
+
+
+def reset_serializer_paths(serializer):
+    """
+    Forgets the paths remembered by serializer.
+    """
+    serializer.__dict__.pop('_serializer_paths', None)
 
 
 def get_serializer_field_path(serializer):
@@ -35,6 +57,172 @@ def get_serializer_source_path(serializer):
     return get_serializer_path(serializer, 'source')
 
 
+def get_serializer_model_field(serializer):
+    """
+    Returns the model field for the source of serializer, or None.
+    """
+    meta = getattr(serializer.parent, 'Meta', None)
+    model = getattr(meta, 'model', None)
+
+    if model is None:
+        return None
+
+    return get_model_field(model, serializer.source)
+
+
+def get_model_field(model, source):
+    """
+    Returns the model field or reverse relation for source, or None.
+
+    Reverse relations are also found by their accessor name.
+    """
+    meta = model._meta
+
+    try:
+        return meta.get_field(source)
+    except FieldDoesNotExist:
+        pass
+
+    for field in meta.get_fields():
+        if field.auto_created and not field.concrete and field.is_relation:
+            if field.get_accessor_name() == source:
+                return field
+
+    return None
+
+
+def get_model_relations(source_path, model):
+    """
+    Returns the relation fields along source_path from model, or None.
+    """
+    fields = list()
+
+    for source in source_path:
+        if model is None:
+            return None
+
+        field = get_model_field(model, source)
+
+        if field is None or not field.is_relation:
+            return None
+
+        fields.append(field)
+        model = field.related_model
+
+    return fields
+
+
+def is_single_relation(field):
+    """
+    True if field is a relation to a single object which can be joined.
+    """
+    return (field.many_to_one or field.one_to_one) and field.related_model is not None
+
+
+def get_serializer_fields(serializer):
+    """
+    Returns the fields rendered by an expanded serializer.
+    """
+    return getattr(serializer, 'expanded_fields', serializer.fields)
+
+
+def get_serializer_columns(serializer, model):
+    """
+    Returns the names of the model fields read by serializer, or None.
+
+    None is returned when a field reads something other than model fields.
+    Nested serializers only contribute the columns of their relation.
+    """
+    meta = getattr(serializer, 'Meta', None)
+    columns = [model._meta.pk.name]
+
+    if getattr(meta, 'version_field', None):
+        columns.append(meta.version_field)
+
+    for field in get_serializer_fields(serializer).values():
+        if field.write_only:
+            continue
+
+        if isinstance(field, HyperlinkedIdentityField):
+            if field.lookup_field != 'pk':
+                columns.append(field.lookup_field)
+
+            continue
+
+        child = getattr(field, 'child', None)
+
+        if child is not None and child.parent is serializer:
+            field = child
+
+        if field.source == '*':
+            return None
+
+        model_field = get_model_field(model, field.source_attrs[0])
+
+        if model_field is None:
+            return None
+
+        if isinstance(model_field, GenericForeignKey):
+            columns.extend((model_field.ct_field, model_field.fk_field))
+        elif model_field.concrete:
+            columns.append(model_field.name)
+
+    return list(OrderedDict.fromkeys(columns))
+
+
+def get_serializer_models(serializer, model):
+    """
+    Returns the set of models read by serializer for objects of model, or None.
+
+    None is returned when a field reads something other than model fields.
+    Nested list serializers are skipped, their expansions read on their own.
+    """
+    models = set([model])
+
+    for field in get_serializer_fields(serializer).values():
+        if field.write_only or isinstance(field, HyperlinkedIdentityField):
+            continue
+
+        if field.source == '*':
+            if hasattr(field, 'child'):
+                continue
+
+            return None
+
+        current = model
+
+        for source in field.source_attrs:
+            model_field = get_model_field(current, source)
+
+            if model_field is None:
+                return None
+
+            if not model_field.is_relation or model_field.related_model is None:
+                break
+
+            current = model_field.related_model
+            models.add(current)
+
+    return models
+
+
+def get_source_objects(objects, source_path):
+    """
+    Returns the objects found by following source_path from objects.
+
+    To many relations are followed through their managers, which return
+    prefetched objects without querying.
+    """
+    for source in source_path:
+        objects = [getattr(obj, source) for obj in objects]
+        objects = [obj for obj in objects if obj is not None]
+
+        if objects and isinstance(objects[0], BaseManager):
+            objects = [obj for manager in objects for obj in manager.all()]
+
+    return objects
+
+
 def get_model_source_name(source_path, model):
     """
     Returns a verified model source name, or None.
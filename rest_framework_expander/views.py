@@ -1,7 +1,25 @@
+import hashlib
+import operator
+
+from collections import OrderedDict
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import connections
+from django.db.models import Count, Max, Q
+from django.db.models.fields import FieldDoesNotExist
+from django.http import StreamingHttpResponse
+from django.utils import six
+from django.utils.six.moves import reduce
+from django.utils.http import parse_etags, quote_etag
+from rest_framework import mixins, status
 from rest_framework.generics import GenericAPIView
 from rest_framework.response import Response
+from rest_framework.utils.serializer_helpers import ReturnList
 
+from rest_framework_expander import caches
+from rest_framework_expander.metrics import ExpanderMetrics, measure, metrics_recorded
+from rest_framework_expander.renderers import ExpanderFragmentJSONRenderer
 from rest_framework_expander.settings import expander_settings
+from rest_framework_expander.utils import get_serializer_models
 
 
 class ExpanderViewMixin(object):
@@ -9,8 +27,10 @@ class ExpanderViewMixin(object):
     Expander support for views.
     """
     expander_adapter_class = expander_settings.DEFAULT_ADAPTER_CLASS
+    expander_cost_estimator_class = expander_settings.DEFAULT_COST_ESTIMATOR_CLASS
     expander_optimizer_class = expander_settings.DEFAULT_OPTIMIZER_CLASS
     expander_parser_class = expander_settings.DEFAULT_PARSER_CLASS
+    expander_response_cache = caches.response_cache
 
     def get_expander_adapter(self, serializer):
         """
@@ -30,44 +50,607 @@ class ExpanderViewMixin(object):
         """
         return self.expander_optimizer_class(adapter)
 
+    def get_expander_cost_estimator(self, adapter):
+        """
+        Returns an instance of the expander cost estimator class.
+        """
+        return self.expander_cost_estimator_class(adapter.context['expander'], self.get_expander_rows(adapter))
+
+    def get_expander_rows(self, adapter):
+        """
+        Returns the estimated number of objects rendered by the serializer.
+        """
+        if not adapter.many:
+            return 1
+
+        paginator = getattr(self, 'paginator', None)
+        page_size = None
+
+        if hasattr(paginator, 'get_page_size'):
+            page_size = paginator.get_page_size(self.request)
+        elif hasattr(paginator, 'get_limit'):
+            page_size = paginator.get_limit(self.request)
+        elif paginator is not None:
+            page_size = getattr(paginator, 'page_size', None)
+
+        return page_size or expander_settings.COST_UNPAGINATED_ROWS
+
+    def get_expander_serializers(self, adapter):
+        """
+        Returns the object serializer followed by the serializers of all expansions.
+        """
+        index = adapter.context['expander'].index
+        return [adapter.object_serializer] + [index[path].serializer for path in sorted(index) if path]
+
+    def get_expander_models(self, adapter):
+        """
+        Returns the set of models read for the response, or None if unknown.
+        """
+        models = set()
+
+        for serializer in self.get_expander_serializers(adapter):
+            model = getattr(getattr(serializer, 'Meta', None), 'model', None)
+            serializer_models = get_serializer_models(serializer, model) if model is not None else None
+
+            if serializer_models is None:
+                return None
+
+            models.update(serializer_models)
+
+        return models
+
+    def get_expander_cache_scope(self):
+        """
+        Returns the scope separating cached responses between users.
+
+        Override to add a tenant or anything else the response depends on.
+        """
+        user = getattr(self.request, 'user', None)
+
+        if user is None or not user.is_authenticated():
+            return None
+
+        return user.pk
+
+    def get_expander_cache_key(self, adapter):
+        """
+        Returns the response cache key for the request, or None.
+
+        Keyed by view, path, query string, normalized expansion tree, media
+        type and scope. Responses reading unknown models are not cached.
+        """
+        if self.expander_response_cache is None or self.request.method != 'GET':
+            return None
+
+        models = self.get_expander_models(adapter)
+
+        if models is None:
+            return None
+
+        expansion_key = self.expander_parser_class.expansion_key
+        query = sorted((key, values) for key, values in self.request.query_params.lists() if key != expansion_key)
+
+        parts = (
+            type(self).__module__,
+            type(self).__name__,
+            self.request.build_absolute_uri(self.request.path),
+            query,
+            adapter.context['expander'].signature,
+            getattr(self.request, 'accepted_media_type', None),
+            self.get_expander_cache_scope(),
+        )
+
+        return self.expander_response_cache.get_key(parts, models)
+
+    def get_cached_expander_response(self, adapter):
+        """
+        Returns the cached response for the request, or None.
+
+        Otherwise the response is cached once it is rendered.
+        """
+        key = self.get_expander_cache_key(adapter)
+
+        if key is None:
+            return None
+
+        response = self.expander_response_cache.get(key)
+
+        if response is None:
+            self._expander_cache_key = key
+
+        return response
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super(ExpanderViewMixin, self).finalize_response(request, response, *args, **kwargs)
+        key = getattr(self, '_expander_cache_key', None)
+
+        if key is not None and response.status_code == status.HTTP_200_OK and not response.streaming:
+            response.add_post_render_callback(lambda response: self.expander_response_cache.set(key, response))
+
+        return response
+
+    def get_serializer_context(self):
+        context = super(ExpanderViewMixin, self).get_serializer_context()
+
+        if getattr(getattr(self.request, 'accepted_renderer', None), 'fragments', False):
+            context['expander_fragments'] = True
+
+        return context
+
     def run_expander(self, serializer):
         """
-        Runs the expander parser.
+        Runs the expander parser and enforces the expander cost.
         """
         adapter = self.get_expander_adapter(serializer)
         parser = self.get_expander_parser(adapter)
         adapter.context['expander'] = parser.parse()
+        self.get_expander_cost_estimator(adapter).enforce()
 
     def get_serializer(self, *args, **kwargs):
         serializer = super(ExpanderViewMixin, self).get_serializer(*args, **kwargs)
         self.run_expander(serializer)
         return serializer
 
+    def filter_queryset(self, queryset):
+        queryset = super(ExpanderViewMixin, self).filter_queryset(queryset)
+        optimizer = getattr(self, '_expander_optimizer', None)
+
+        if optimizer is not None:
+            queryset = optimizer.to_optimized_queryset(queryset)
+
+            if not getattr(self, '_expander_deferred', True):
+                queryset = queryset.defer(None)
+
+        return queryset
+
+    def get_optimized_object(self, optimizer, deferred=True):
+        """
+        Returns the object the view is displaying, loaded with optimizer.
+
+        Set deferred to False to load all columns of an object which is going
+        to be saved, as saving a deferred object only writes its loaded columns.
+        """
+        self._expander_optimizer = optimizer
+        self._expander_deferred = deferred
+
+        try:
+            instance = self.get_object()
+        finally:
+            self._expander_optimizer = None
+            self._expander_deferred = True
+
+        return optimizer.to_optimized_objects([instance])[0]
+
+    def get_optimized_instance(self, instance, optimizer):
+        """
+        Reloads a saved instance through the view queryset with optimizer.
+
+        Returns instance itself if the queryset does not contain it.
+        """
+        queryset = optimizer.to_optimized_queryset(self.get_queryset())
+
+        try:
+            instance = queryset.get(pk=instance.pk)
+        except ObjectDoesNotExist:
+            return instance
+
+        return optimizer.to_optimized_objects([instance])[0]
+
+    def reload_expander_instance(self, serializer):
+        """
+        Replaces the saved instance of serializer with an optimized one.
+        """
+        adapter = self.get_expander_adapter(serializer)
+        optimizer = self.get_expander_optimizer(adapter)
+        adapter.instance = self.get_optimized_instance(adapter.instance, optimizer)
+
 
 class ExpanderListModelMixin(ExpanderViewMixin):
     """
     Provides a generic list view with expander optimizations.
+
+    Set expander_compiler_class to render rows from a values() projection.
+    Set expander_stream to stream lists in chunks instead of paginating them,
+    either as a JSON array or as newline delimited JSON. Side-loaded lists
+    render nested expansions as references to a top level included map.
+    Set expander_etag to answer conditional requests from row versions.
     """
+    expander_compiler_class = None
+    expander_etag = False
+    expander_stream = False
+    expander_stream_format = 'json'
+    expander_stream_chunk_size = expander_settings.STREAM_CHUNK_SIZE
+
+    def get_expander_compiler(self, adapter, model):
+        """
+        Returns an instance of the expander compiler class, or None.
+        """
+        if self.expander_compiler_class is None:
+            return None
+
+        return self.expander_compiler_class(adapter.object_serializer, model)
+
+    def get_expander_metrics(self, queryset):
+        """
+        Returns an ExpanderMetrics instance for the request, or None.
+
+        Streamed lists are rendered after the view returns and not measured.
+        """
+        if not expander_settings.METRICS or self.expander_stream:
+            return None
+
+        return ExpanderMetrics(connections[queryset.db])
+
+    def record_expander_metrics(self, response, metrics):
+        """
+        Publishes the metrics of a request.
+        """
+        metrics_recorded.send(sender=type(self), view=self, request=self.request, metrics=metrics)
+
+        if expander_settings.METRICS_SERVER_TIMING:
+            response['Server-Timing'] = metrics.to_server_timing()
+
+    def is_expander_sideloaded(self):
+        """
+        True if expanded objects should be side-loaded into included.
+
+        Selected by the SIDELOAD_KEY query parameter or a renderer with sideload set.
+        """
+        if getattr(getattr(self.request, 'accepted_renderer', None), 'sideload', False):
+            return True
+
+        value = self.request.query_params.get(expander_settings.SIDELOAD_KEY, '')
+        return value.lower() in ('1', 'true', 'yes')
+
+    def get_expander_versions(self, queryset, adapter):
+        """
+        Returns the row count and latest version of every rendered model, or None.
+
+        The root queryset is aggregated as filtered, the models of expanded
+        serializers as a whole. None is returned if any serializer of the
+        expansion tree lacks a version_field in its Meta.
+        """
+        aggregates = OrderedDict()
+
+        for serializer in self.get_expander_serializers(adapter):
+            meta = getattr(serializer, 'Meta', None)
+            version_field = getattr(meta, 'version_field', None)
+
+            if version_field is None:
+                return None
+
+            if not aggregates:
+                aggregates[None] = queryset.aggregate(count=Count('pk'), version=Max(version_field))
+            elif meta.model not in aggregates:
+                aggregates[meta.model] = meta.model._default_manager.aggregate(count=Count('pk'), version=Max(version_field))
+
+        return [(aggregate['count'], aggregate['version']) for aggregate in aggregates.values()]
+
+    def get_expander_etag(self, queryset, adapter):
+        """
+        Returns the entity tag of the list, or None.
+
+        Computed with aggregate queries before any row is fetched.
+        """
+        versions = self.get_expander_versions(queryset, adapter)
+
+        if versions is None:
+            return None
+
+        renderer = getattr(self.request, 'accepted_media_type', None)
+        parts = [self.request.build_absolute_uri(), renderer] + versions
+        digest = hashlib.md5(':'.join(six.text_type(part) for part in parts).encode('utf-8'))
+        return quote_etag(digest.hexdigest())
+
+    def is_expander_not_modified(self, etag):
+        """
+        True if the If-None-Match header of the request matches etag.
+        """
+        header = self.request.META.get('HTTP_IF_NONE_MATCH')
+
+        if not header:
+            return False
+
+        etags = parse_etags(header)
+        return '*' in etags or etag in [quote_etag(value) for value in etags]
 
     def list(self, request, *args, **kwargs):
         queryset = self.filter_queryset(self.get_queryset())
-        serializer = self.get_serializer(queryset, many=True)
+        metrics = self.get_expander_metrics(queryset)
+
+        if metrics is None:
+            return self.list_queryset(queryset, None)
+
+        with metrics:
+            response = self.list_queryset(queryset, metrics)
+
+        self.record_expander_metrics(response, metrics)
+        return response
+
+    def list_queryset(self, queryset, metrics):
+        """
+        Returns the list response for queryset, measuring phases in metrics.
+        """
+        with measure(metrics, 'parse'):
+            serializer = self.get_serializer(queryset, many=True)
 
         adapter = self.get_expander_adapter(serializer)
         optimizer = self.get_expander_optimizer(adapter)
 
-        queryset = optimizer.to_optimized_queryset(queryset)
-        page = self.paginate_queryset(queryset)
+        if metrics is not None:
+            adapter.context['expander_metrics'] = metrics
+
+        etag = None
+
+        if self.expander_etag:
+            with measure(metrics, 'validate'):
+                etag = self.get_expander_etag(queryset, adapter)
+
+        if etag is not None:
+            self.headers['ETag'] = etag
+
+            if self.is_expander_not_modified(etag):
+                return Response(status=status.HTTP_304_NOT_MODIFIED)
+
+        if self.expander_stream:
+            return self.stream_list(queryset, adapter, optimizer)
+
+        response = self.get_cached_expander_response(adapter)
+
+        if response is not None:
+            return response
+
+        sideload = self.is_expander_sideloaded()
+        compiler = self.get_expander_compiler(adapter, queryset.model) if not sideload else None
+
+        if sideload:
+            adapter.context['expander_included'] = OrderedDict()
+
+        if compiler is not None and compiler.compilable:
+            with measure(metrics, 'fetch'):
+                return self.list_values(queryset, adapter, optimizer, compiler)
+
+        with measure(metrics, 'optimize'):
+            queryset = optimizer.to_optimized_queryset(queryset)
+
+        with measure(metrics, 'fetch'):
+            if metrics is not None:
+                metrics.enter_node(tuple())
+
+            try:
+                page = self.paginate_queryset(queryset)
+                adapter.instance = list(page if page is not None else queryset)
+            finally:
+                if metrics is not None:
+                    metrics.exit_node()
 
-        adapter.instance = list(page if page is not None else queryset)
+            if adapter.instance:
+                adapter.instance = optimizer.to_optimized_objects(adapter.instance)
 
-        if adapter.instance:
-            adapter.instance = optimizer.to_optimized_objects(adapter.instance)
+        with measure(metrics, 'serialize'):
+            data = serializer.data
+
+        if not sideload:
+            return self.get_paginated_response(data) if page is not None else Response(data)
+
+        response = self.get_paginated_response(data) if page is not None else Response(data)
+
+        # Paginators may answer with the bare list and describe pages in headers.
+        if not isinstance(response.data, dict):
+            response.data = OrderedDict((('results', response.data),))
+
+        response.data['included'] = adapter.context['expander_included']
+        return response
+
+    def list_values(self, queryset, adapter, optimizer, compiler):
+        """
+        Renders the list from a values() projection of queryset.
+
+        Fallback fields are rendered from instances loaded for the page.
+        """
+        values = queryset.values(*compiler.columns)
+        page = self.paginate_queryset(values)
+        rows = list(page if page is not None else values)
+
+        instances = dict()
+
+        if compiler.fallback_fields and rows:
+            pks = [row[compiler.pk_column] for row in rows]
+            objects = list(optimizer.to_optimized_queryset(queryset).filter(pk__in=pks))
+
+            if objects:
+                objects = optimizer.to_optimized_objects(objects)
+
+            instances = dict((obj.pk, obj) for obj in objects)
+
+        data = ReturnList(
+            [compiler.render(row, instances.get(row[compiler.pk_column])) for row in rows],
+            serializer=adapter.serializer,
+        )
 
         if page is not None:
-            return self.get_paginated_response(serializer.data)
+            return self.get_paginated_response(data)
         else:
-            return Response(serializer.data)
+            return Response(data)
+
+    def stream_list(self, queryset, adapter, optimizer):
+        """
+        Returns a streaming response rendering queryset chunk by chunk.
+        """
+        queryset = optimizer.to_optimized_queryset(queryset)
+        content = self.get_expander_stream(queryset, adapter, optimizer)
+
+        if self.expander_stream_format == 'ndjson':
+            return StreamingHttpResponse(content, content_type='application/x-ndjson')
+        else:
+            return StreamingHttpResponse(content, content_type='application/json')
+
+    def get_expander_stream_keys(self, queryset):
+        """
+        Returns the (attname, descending) pairs ordering queryset by keys, or None.
+
+        Only orderings of local, non nullable columns can be paged by keys,
+        the primary key is appended to break ties.
+        """
+        query = queryset.query
+        meta = queryset.model._meta
+        ordering = query.order_by or (meta.ordering if query.default_ordering else [])
+        keys = list()
+
+        for term in ordering:
+            if not isinstance(term, six.string_types) or term == '?':
+                return None
+
+            descending = term.startswith('-')
+            name = term.lstrip('-')
+            name = meta.pk.name if name == 'pk' else name
+
+            try:
+                field = meta.get_field(name)
+            except FieldDoesNotExist:
+                return None
+
+            if field.is_relation or field.null or not field.concrete:
+                return None
+
+            keys.append((field.attname, descending))
+
+        if meta.pk.attname not in [attname for attname, descending in keys]:
+            keys.append((meta.pk.attname, False))
+
+        return keys
+
+    def get_expander_stream_filter(self, keys, obj):
+        """
+        Returns a filter for the rows following obj in the order of keys.
+        """
+        values = [getattr(obj, attname) for attname, descending in keys]
+        conditions = list()
+
+        for index, (attname, descending) in enumerate(keys):
+            lookups = dict(zip([key[0] for key in keys[:index]], values[:index]))
+            lookups[attname + ('__lt' if descending else '__gt')] = values[index]
+            conditions.append(Q(**lookups))
+
+        return reduce(operator.or_, conditions)
+
+    def get_expander_stream_chunks(self, queryset):
+        """
+        Yields lists of at most expander_stream_chunk_size objects.
+
+        Querysets are paged by their ordering and primary key. Orderings over
+        relations, nullable columns or expressions can not be paged by keys
+        and are sliced, which skips or repeats rows changed while streaming.
+        Every chunk is a separate query, so prefetches run per chunk.
+        """
+        size = self.expander_stream_chunk_size
+        keys = self.get_expander_stream_keys(queryset)
+        offset = 0
+        last = None
+
+        if keys is not None:
+            queryset = queryset.order_by(*[('-' if descending else '') + attname for attname, descending in keys])
+
+        while True:
+            if keys is not None:
+                chunk = queryset.filter(self.get_expander_stream_filter(keys, last)) if last is not None else queryset
+                chunk = list(chunk[:size])
+            else:
+                chunk = list(queryset[offset:offset + size])
+
+            if chunk:
+                yield chunk
+
+            if len(chunk) < size:
+                return
+
+            offset += size
+            last = chunk[-1]
+
+    def get_expander_stream(self, queryset, adapter, optimizer):
+        """
+        Yields the rendered list, releasing the objects of each chunk.
+
+        Collapsed representations are rendered from shared JSON fragments.
+        """
+        ndjson = self.expander_stream_format == 'ndjson'
+        renderer = ExpanderFragmentJSONRenderer()
+        serializer = adapter.object_serializer
+        separator = b''
+
+        adapter.context['expander_fragments'] = True
+
+        if not ndjson:
+            yield b'['
+
+        for chunk in self.get_expander_stream_chunks(queryset):
+            chunk = optimizer.to_optimized_objects(chunk)
+            items = [renderer.render(serializer.to_representation(obj)) for obj in chunk]
+
+            if ndjson:
+                yield b''.join(item + b'\n' for item in items)
+            else:
+                yield separator + b','.join(items)
+                separator = b','
+
+            adapter.context.pop('representations', None)
+            adapter.context['expander'].clear_data()
+
+        if not ndjson:
+            yield b']'
+
+
+class ExpanderRetrieveModelMixin(ExpanderViewMixin, mixins.RetrieveModelMixin):
+    """
+    Provides a generic retrieve view with expander optimizations.
+    """
+
+    def retrieve(self, request, *args, **kwargs):
+        serializer = self.get_serializer()
+
+        adapter = self.get_expander_adapter(serializer)
+        optimizer = self.get_expander_optimizer(adapter)
+
+        adapter.instance = self.get_optimized_object(optimizer)
+        return Response(serializer.data)
+
+
+class ExpanderCreateModelMixin(ExpanderViewMixin, mixins.CreateModelMixin):
+    """
+    Provides a generic create view rendering the created object optimized.
+    """
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        self.perform_create(serializer)
+        self.reload_expander_instance(serializer)
+
+        headers = self.get_success_headers(serializer.data)
+        return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
+
+
+class ExpanderUpdateModelMixin(ExpanderViewMixin, mixins.UpdateModelMixin):
+    """
+    Provides a generic update view loading the updated object optimized.
+    """
+
+    def update(self, request, *args, **kwargs):
+        partial = kwargs.pop('partial', False)
+        serializer = self.get_serializer(data=request.data, partial=partial)
+
+        adapter = self.get_expander_adapter(serializer)
+        optimizer = self.get_expander_optimizer(adapter)
+        adapter.instance = self.get_optimized_object(optimizer, deferred=False)
+
+        serializer.is_valid(raise_exception=True)
+        self.perform_update(serializer)
+
+        if getattr(adapter.instance, '_prefetched_objects_cache', None):
+            adapter.instance = self.get_optimized_instance(adapter.instance, optimizer)
+
+        return Response(serializer.data)
 
 
 class ExpanderListAPIView(ExpanderListModelMixin, GenericAPIView):
@@ -77,3 +660,33 @@ class ExpanderListAPIView(ExpanderListModelMixin, GenericAPIView):
 
     def get(self, request, *args, **kwargs):
         return self.list(request, *args, **kwargs)
+
+
+class ExpanderRetrieveAPIView(ExpanderRetrieveModelMixin, GenericAPIView):
+    """
+    Provides a retrieve API view with expander optimizations.
+    """
+
+    def get(self, request, *args, **kwargs):
+        return self.retrieve(request, *args, **kwargs)
+
+
+class ExpanderCreateAPIView(ExpanderCreateModelMixin, GenericAPIView):
+    """
+    Provides a create API view with expander optimizations.
+    """
+
+    def post(self, request, *args, **kwargs):
+        return self.create(request, *args, **kwargs)
+
+
+class ExpanderUpdateAPIView(ExpanderUpdateModelMixin, GenericAPIView):
+    """
+    Provides an update API view with expander optimizations.
+    """
+
+    def put(self, request, *args, **kwargs):
+        return self.update(request, *args, **kwargs)
+
+    def patch(self, request, *args, **kwargs):
+        return self.partial_update(request, *args, **kwargs)
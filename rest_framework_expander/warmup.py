@@ -0,0 +1,183 @@
+import logging
+
+from collections import OrderedDict
+from django.core.exceptions import ImproperlyConfigured
+from django.core.urlresolvers import get_resolver
+from django.http import HttpRequest, QueryDict
+from rest_framework.request import Request
+from rest_framework.serializers import ListSerializer, Serializer
+
+from rest_framework_expander.settings import DEFAULTS, expander_settings
+from rest_framework_expander.views import ExpanderViewMixin
+
+
+logger = logging.getLogger(__name__)
+
+
+def get_expander_views(patterns=None):
+    """
+    Returns the expander view classes routed by the URL patterns.
+
+    Defaults to the patterns of the root URLconf.
+    """
+    if patterns is None:
+        patterns = get_resolver(None).url_patterns
+
+    views = list()
+
+    for pattern in patterns:
+        if hasattr(pattern, 'url_patterns'):
+            view_classes = get_expander_views(pattern.url_patterns)
+        else:
+            view_class = getattr(pattern.callback, 'cls', None)
+            view_classes = [view_class] if isinstance(view_class, type) else []
+
+        for view_class in view_classes:
+            if issubclass(view_class, ExpanderViewMixin) and view_class not in views:
+                views.append(view_class)
+
+    return views
+
+
+def get_expandable_paths(serializer, max_depth, path=tuple()):
+    """
+    Returns all paths which can be expanded from serializer, up to max_depth.
+
+    Resolves the lazy child serializers of every nested field on the way.
+    """
+    if len(path) >= max_depth:
+        return list()
+
+    paths = list()
+
+    try:
+        fields = serializer.fields
+    except ImportError as e:
+        raise ImproperlyConfigured('Could not resolve the fields of {} at {!r}: {}'.format(
+            type(serializer).__name__, '.'.join(path), e
+        ))
+
+    for field_name, field in fields.items():
+        if not isinstance(field, (ListSerializer, Serializer)):
+            continue
+
+        child_path = path + (field_name,)
+
+        while hasattr(field, 'child'):
+            field = field.child
+
+        paths.append(child_path)
+        paths.extend(get_expandable_paths(field, max_depth, child_path))
+
+    return paths
+
+
+class ExpanderWarmUp(object):
+    """
+    Prepares the caches shared between requests before the first request.
+
+    Every expandable path of every view is parsed and optimized once, which
+    imports lazy serializers, builds field templates and caches the plans.
+    """
+
+    def __init__(self, view_classes=None):
+        self.view_classes = view_classes
+
+    def get_view_classes(self):
+        """
+        Returns the view classes to warm up.
+        """
+        if self.view_classes is None:
+            return get_expander_views()
+
+        return self.view_classes
+
+    def get_request(self, params):
+        """
+        Returns a GET request with the query parameters params.
+        """
+        request = HttpRequest()
+        request.method = 'GET'
+        request.GET = QueryDict('', mutable=True)
+        request.GET.update(params)
+        return Request(request)
+
+    def get_view(self, view_class, params=None):
+        """
+        Returns an instance of view_class set up like for a list request.
+        """
+        view = view_class(action='list')
+        view.request = self.get_request(params or dict())
+        view.args = tuple()
+        view.kwargs = dict()
+        view.format_kwarg = None
+        return view
+
+    def get_queryset(self, view):
+        """
+        Returns the queryset of view, or None if it needs a real request.
+        """
+        try:
+            return view.get_queryset()
+        except Exception as e:
+            logger.warning('Skipping the optimizer warm-up of %s: %s', type(view).__name__, e)
+            return None
+
+    def get_serializer(self, view):
+        """
+        Returns an unbound list serializer for view.
+        """
+        serializer_class = view.get_serializer_class()
+        return serializer_class(many=True, context=view.get_serializer_context())
+
+    def warm_up_settings(self):
+        """
+        Resolves all expander settings, including the import strings.
+        """
+        for name in DEFAULTS:
+            getattr(expander_settings, name)
+
+    def warm_up_view(self, view_class):
+        """
+        Caches the plans of all expandable paths of view_class.
+
+        Optimizer plans are skipped for views whose queryset can not be built
+        without a real request. Returns the expandable paths.
+        """
+        view = self.get_view(view_class)
+        adapter = view.get_expander_adapter(self.get_serializer(view))
+        parser = view.get_expander_parser(adapter)
+        paths = get_expandable_paths(adapter.object_serializer, parser.max_depth)
+        queryset = self.get_queryset(view) if paths else None
+
+        for path in paths:
+            params = {parser.expansion_key: parser.expansion_path_separator.join(path)}
+            self.warm_up_expansion(self.get_view(view_class, params), queryset)
+
+        return paths
+
+    def warm_up_expansion(self, view, queryset=None):
+        """
+        Parses the expansion requested from view and optimizes queryset, if any.
+        """
+        serializer = self.get_serializer(view)
+        adapter = view.get_expander_adapter(serializer)
+        parser = view.get_expander_parser(adapter)
+        parser.fail_on_field_missing = True
+
+        adapter.context['expander'] = parser.parse()
+
+        if queryset is not None:
+            view.get_expander_optimizer(adapter).to_optimized_queryset(queryset)
+
+    def run(self):
+        """
+        Warms up all view classes, returning their expandable paths by class.
+        """
+        self.warm_up_settings()
+        results = OrderedDict()
+
+        for view_class in self.get_view_classes():
+            results[view_class] = self.warm_up_view(view_class)
+
+        return results
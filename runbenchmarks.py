@@ -0,0 +1,241 @@
+#! /usr/bin/env python
+"""
+Benchmarks expansion workloads against synthetic data on SQLite.
+
+Results are printed as JSON, one entry per workload and optimizer class.
+
+    $ ./runbenchmarks.py --size 200 --fanout 5 --repeat 20 --output before.json
+"""
+from __future__ import division, print_function
+
+import argparse
+import json
+import os
+import platform
+import sys
+
+from timeit import default_timer
+
+
+sys.path.append(os.path.dirname(__file__))
+
+
+WORKLOADS = (
+    ('collapsed', 'thirds', ''),
+    ('shallow', 'thirds', 'extra'),
+    ('deep', 'thirds', 'second.first.extra'),
+    ('wide', 'thirds', 'extra,second,second.extra,second.first'),
+    ('list', 'firsts', 'extra,seconds'),
+)
+
+OPTIMIZERS = (
+    'rest_framework_expander.optimizers.PrefetchExpanderOptimizerSet',
+    'rest_framework_expander.optimizers.SelectExpanderOptimizerSet',
+    'rest_framework_expander.optimizers.RelationExpanderOptimizerSet',
+    'rest_framework_expander.optimizers.ConcurrentRelationExpanderOptimizerSet',
+)
+
+PERCENTILES = (50, 90, 99)
+
+
+def configure(database):
+    """
+    Configures Django for the tests app on a SQLite database.
+    """
+    from django.conf import settings
+
+    settings.configure(
+        DEBUG=False,
+        ALLOWED_HOSTS=['testserver'],
+        DATABASES={'default': {'ENGINE': 'django.db.backends.sqlite3',
+                               'NAME': database}},
+        SECRET_KEY='not very secret in benchmarks',
+        ROOT_URLCONF='tests.urls',
+        INSTALLED_APPS=(
+            'django.contrib.auth',
+            'django.contrib.contenttypes',
+            'rest_framework',
+            'tests',
+        ),
+        REST_FRAMEWORK_EXPANDER={
+            'MAX_DEPTH': 3,
+        },
+    )
+
+    import django
+    django.setup()
+
+    from django.core.management import call_command
+    call_command('migrate', verbosity=0, interactive=False)
+
+
+def build_dataset(size, fanout):
+    """
+    Replaces all rows with size firsts, each with fanout seconds and thirds.
+    """
+    from tests.models import ExtraModel, FirstModel, SecondModel, ThirdModel
+
+    for model in (ThirdModel, SecondModel, FirstModel, ExtraModel):
+        model.objects.all().delete()
+
+    ExtraModel.objects.bulk_create([ExtraModel(content=str(i)) for i in range(size)])
+    extras = list(ExtraModel.objects.order_by('pk'))
+
+    FirstModel.objects.bulk_create([
+        FirstModel(content=str(i), extra=extras[i]) for i in range(size)
+    ])
+    firsts = list(FirstModel.objects.order_by('pk'))
+
+    SecondModel.objects.bulk_create([
+        SecondModel(content=str(j), extra=extras[(i + j) % size], first=first)
+        for i, first in enumerate(firsts)
+        for j in range(fanout)
+    ])
+    seconds = list(SecondModel.objects.order_by('pk'))
+
+    ThirdModel.objects.bulk_create([
+        ThirdModel(content=str(i), extra=extras[i % size], second=second)
+        for i, second in enumerate(seconds)
+    ])
+
+
+def get_view(resource, optimizer_class):
+    """
+    Returns the list view of resource using optimizer_class.
+    """
+    from tests.views import FirstViewSet, ThirdViewSet
+
+    viewset_class = {'firsts': FirstViewSet, 'thirds': ThirdViewSet}[resource]
+    viewset_class = type(str('Benchmark' + viewset_class.__name__), (viewset_class,), {
+        'expander_optimizer_class': optimizer_class,
+    })
+
+    return viewset_class.as_view({'get': 'list'})
+
+
+def request(view, expand):
+    """
+    Renders one list request and returns the response.
+    """
+    from rest_framework.test import APIRequestFactory
+
+    response = view(APIRequestFactory().get('/', {'expand': expand} if expand else {}))
+    response.render()
+    return response
+
+
+def get_percentile(durations, percentile):
+    """
+    Returns the nearest rank percentile of sorted durations.
+    """
+    index = max(0, int(-(-len(durations) * percentile // 100)) - 1)
+    return durations[index]
+
+
+def get_peak_memory(view, expand):
+    """
+    Returns the peak memory of a request in bytes, or None without tracemalloc.
+    """
+    try:
+        import tracemalloc
+    except ImportError:
+        return None
+
+    tracemalloc.start()
+
+    try:
+        request(view, expand)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run_workload(view, expand, repeat):
+    """
+    Returns the measurements of repeat requests after one warm up request.
+    """
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    request(view, expand)
+
+    with CaptureQueriesContext(connection) as queries:
+        request(view, expand)
+
+    durations = list()
+
+    for i in range(repeat):
+        start = default_timer()
+        request(view, expand)
+        durations.append((default_timer() - start) * 1000)
+
+    durations.sort()
+
+    result = {
+        'queries': len(queries),
+        'mean_ms': sum(durations) / len(durations),
+        'peak_memory_bytes': get_peak_memory(view, expand),
+    }
+
+    for percentile in PERCENTILES:
+        result['p{}_ms'.format(percentile)] = get_percentile(durations, percentile)
+
+    return result
+
+
+def run_benchmarks(size, fanout, repeat, workloads=WORKLOADS, optimizers=OPTIMIZERS):
+    """
+    Returns the results of all workloads for all optimizer classes.
+    """
+    import django
+    import rest_framework
+    from rest_framework.settings import import_from_string
+
+    build_dataset(size, fanout)
+    results = list()
+
+    for optimizer in optimizers:
+        optimizer_class = import_from_string(optimizer, None)
+
+        for name, resource, expand in workloads:
+            result = run_workload(get_view(resource, optimizer_class), expand, repeat)
+            result.update(workload=name, resource=resource, expand=expand, optimizer=optimizer_class.__name__)
+            results.append(result)
+
+    return {
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'rest_framework': rest_framework.VERSION,
+        'size': size,
+        'fanout': fanout,
+        'repeat': repeat,
+        'results': results,
+    }
+
+
+def get_parser():
+    parser = argparse.ArgumentParser(description='Benchmarks expansion workloads.')
+    parser.add_argument('--size', type=int, default=100, help='number of first models')
+    parser.add_argument('--fanout', type=int, default=5, help='second models per first model')
+    parser.add_argument('--repeat', type=int, default=20, help='measured requests per workload')
+    parser.add_argument('--database', default=':memory:', help='SQLite database file')
+    parser.add_argument('--workload', action='append', help='only run the named workloads')
+    parser.add_argument('--optimizer', action='append', help='only run the named optimizer classes')
+    parser.add_argument('--output', help='write the results to a file instead of stdout')
+    return parser
+
+
+if __name__ == "__main__":
+    args = get_parser().parse_args()
+    configure(args.database)
+
+    workloads = [workload for workload in WORKLOADS if not args.workload or workload[0] in args.workload]
+    optimizers = [optimizer for optimizer in OPTIMIZERS if not args.optimizer or optimizer.rsplit('.', 1)[1] in args.optimizer]
+
+    output = json.dumps(run_benchmarks(args.size, args.fanout, args.repeat, workloads, optimizers), indent=2, sort_keys=True)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
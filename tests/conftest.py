@@ -35,6 +35,7 @@ def pytest_configure():
 
             'rest_framework',
             'rest_framework.authtoken',
+            'rest_framework_expander',
             'tests',
         ),
         PASSWORD_HASHERS=(
@@ -94,7 +95,7 @@ def project_setup(db):
     """
     Initializes all database objects.
     """
-    from tests.models import ExtraModel, FirstModel, SecondModel, ThirdModel
+    from tests.models import ExtraModel, FirstModel, SecondModel, ThirdModel, TaggedModel
 
     for i in range(5):
         content = str(i)
@@ -102,3 +103,4 @@ def project_setup(db):
         first = FirstModel.objects.create(content=content, extra=extra)
         second = SecondModel.objects.create(content=content, extra=extra, first=first)
         ThirdModel.objects.create(content=content, extra=extra, second=second)
+        TaggedModel.objects.create(content=content, content_object=extra)
@@ -1,8 +1,11 @@
+from django.contrib.contenttypes.fields import GenericForeignKey
+from django.contrib.contenttypes.models import ContentType
 from django.db import models
 
 
 class ExtraModel(models.Model):
     content = models.CharField(max_length=256)
+    attachment = models.FileField(blank=True)
 
 
 class FirstModel(models.Model):
@@ -13,10 +16,17 @@ class FirstModel(models.Model):
 class SecondModel(models.Model):
     content = models.CharField(max_length=256)
     extra = models.ForeignKey('ExtraModel')
-    first = models.ForeignKey('FirstModel')
+    first = models.ForeignKey('FirstModel', related_name='seconds')
 
 
 class ThirdModel(models.Model):
     content = models.CharField(max_length=256)
     extra = models.ForeignKey('ExtraModel')
     second = models.ForeignKey('SecondModel')
+
+
+class TaggedModel(models.Model):
+    content = models.CharField(max_length=256)
+    content_type = models.ForeignKey(ContentType)
+    object_id = models.PositiveIntegerField()
+    content_object = GenericForeignKey('content_type', 'object_id')
@@ -1,7 +1,7 @@
 from rest_framework.serializers import HyperlinkedModelSerializer
 
-from rest_framework_expander.serializers import ExpanderSerializerMixin
-from tests.models import FirstModel, SecondModel, ThirdModel, ExtraModel
+from rest_framework_expander.serializers import ExpanderListSerializer, ExpanderSerializerMixin
+from tests.models import FirstModel, SecondModel, ThirdModel, ExtraModel, TaggedModel
 
 
 class ExtraSerializer(ExpanderSerializerMixin, HyperlinkedModelSerializer):
@@ -12,10 +12,11 @@ class ExtraSerializer(ExpanderSerializerMixin, HyperlinkedModelSerializer):
 
 class FirstSerializer(ExpanderSerializerMixin, HyperlinkedModelSerializer):
     extra = ExtraSerializer(read_only=True)
+    seconds = ExpanderListSerializer('tests.serializers.SecondSerializer', 'firstmodel-detail')
 
     class Meta():
         model = FirstModel
-        fields = ('id', 'url', 'content', 'extra')
+        fields = ('id', 'url', 'content', 'extra', 'seconds')
 
 
 class SecondSerializer(ExpanderSerializerMixin, HyperlinkedModelSerializer):
@@ -34,3 +35,11 @@ class ThirdSerializer(ExpanderSerializerMixin, HyperlinkedModelSerializer):
     class Meta():
         model = ThirdModel
         fields = ('id', 'url', 'content', 'extra', 'second')
+
+
+class TaggedSerializer(ExpanderSerializerMixin, HyperlinkedModelSerializer):
+    content_object = ExtraSerializer(read_only=True)
+
+    class Meta():
+        model = TaggedModel
+        fields = ('id', 'url', 'content', 'content_object')
@@ -0,0 +1,27 @@
+import pytest
+
+from rest_framework.test import APITestCase
+
+from runbenchmarks import run_benchmarks
+
+
+pytestmark = pytest.mark.django_db()
+
+
+class BenchmarkTestCase(APITestCase):
+    """
+    Tests the benchmark harness on a tiny dataset.
+    """
+
+    def test_results(self):
+        report = run_benchmarks(3, 2, 2, workloads=(('shallow', 'thirds', 'extra'),), optimizers=(
+            'rest_framework_expander.optimizers.PrefetchExpanderOptimizerSet',
+            'rest_framework_expander.optimizers.RelationExpanderOptimizerSet',
+        ))
+
+        queries = dict((result['optimizer'], result['queries']) for result in report['results'])
+
+        self.assertEqual({'PrefetchExpanderOptimizerSet': 2, 'RelationExpanderOptimizerSet': 1}, queries)
+
+        for result in report['results']:
+            self.assertLessEqual(result['p50_ms'], result['p99_ms'])
@@ -0,0 +1,111 @@
+from django.test import override_settings
+from rest_framework.request import Request
+from rest_framework.test import APITestCase, APIRequestFactory
+
+from rest_framework_expander import caches
+from rest_framework_expander.caches import RepresentationCache
+from tests.models import ExtraModel
+from tests.serializers import ExtraSerializer, SecondSerializer
+
+
+class VersionedExtraSerializer(ExtraSerializer):
+    class Meta(ExtraSerializer.Meta):
+        cache_representations = True
+        version_field = 'content'
+
+
+class RepresentationCacheTestCase(APITestCase):
+    """
+    Tests RepresentationCache.
+    """
+
+    def setUp(self):
+        self.cache = RepresentationCache('default', 300)
+        self.cache.cache.clear()
+        self.instance = ExtraModel.objects.first()
+
+    def get_serializer(self):
+        """
+        Helper method for creating a serializer with a new request context.
+        """
+        request = Request(APIRequestFactory().get('/extras/'))
+        return VersionedExtraSerializer(context={'request': request})
+
+    def test_shared_between_requests(self):
+        representation = {'id': self.instance.pk}
+        self.cache.set(self.get_serializer(), self.instance, representation)
+
+        self.assertEqual(representation, self.cache.get(self.get_serializer(), self.instance))
+
+    def test_version(self):
+        self.cache.set(self.get_serializer(), self.instance, {'id': self.instance.pk})
+        self.instance.content = 'changed'
+
+        self.assertIsNone(self.cache.get(self.get_serializer(), self.instance))
+
+    def test_invalidate(self):
+        self.cache.set(self.get_serializer(), self.instance, {'id': self.instance.pk})
+        self.cache.invalidate(ExtraModel)
+
+        self.assertIsNone(self.cache.get(self.get_serializer(), self.instance))
+
+    def test_deferred_instance(self):
+        instance = ExtraModel.objects.only('id').get(pk=self.instance.pk)
+        self.cache.set(self.get_serializer(), instance, {'id': self.instance.pk})
+        self.cache.invalidate(ExtraModel)
+
+        self.assertIsNone(self.cache.get(self.get_serializer(), instance))
+
+
+@override_settings(REST_FRAMEWORK_EXPANDER={'REPRESENTATION_CACHE': 'default'})
+class RepresentationCacheRequestTestCase(APITestCase):
+    """
+    Tests the representation cache through requests.
+    """
+
+    def setUp(self):
+        ExtraSerializer.Meta.cache_representations = True
+        caches.representation_cache.cache.clear()
+        self.instance = ExtraModel.objects.first()
+
+    def tearDown(self):
+        del ExtraSerializer.Meta.cache_representations
+
+    def get_content(self):
+        """
+        Helper method for reading the content of the cached object.
+        """
+        return self.client.get('/extras/{}/'.format(self.instance.pk)).data['content']
+
+    def test_read_from_cache(self):
+        content = self.get_content()
+        ExtraModel.objects.filter(pk=self.instance.pk).update(content='changed')
+
+        self.assertEqual(content, self.get_content())
+
+    def test_invalidated_on_save(self):
+        self.get_content()
+        self.instance.content = 'changed'
+        self.instance.save()
+
+        self.assertEqual('changed', self.get_content())
+
+    def test_invalidated_on_delete(self):
+        self.get_content()
+        ExtraModel.objects.filter(pk=self.instance.pk).update(content='changed')
+        ExtraModel.objects.exclude(pk=self.instance.pk).first().delete()
+
+        self.assertEqual('changed', self.get_content())
+
+    def test_field_sets_not_shared(self):
+        SecondSerializer.Meta.cache_representations = True
+
+        try:
+            self.client.get('/thirds/', {'expand': 'second', 'fields': 'id,second.content'})
+            response = self.client.get('/thirds/', {'expand': 'second'})
+        finally:
+            del SecondSerializer.Meta.cache_representations
+
+        for result in response.data:
+            self.assertIn('url', result['second'])
+            self.assertIn('content', result['second'])
@@ -0,0 +1,104 @@
+import pytest
+
+from rest_framework.relations import SlugRelatedField, StringRelatedField
+from rest_framework.test import APITestCase, APIRequestFactory
+
+from rest_framework_expander.compilers import ExpanderValuesCompiler
+from tests.models import ExtraModel, ThirdModel
+from tests.serializers import ExtraSerializer, ThirdSerializer
+from tests.views import ExtraViewSet, FirstViewSet, ThirdViewSet
+
+
+pytestmark = pytest.mark.django_db()
+
+
+class ValuesThirdViewSet(ThirdViewSet):
+    expander_compiler_class = ExpanderValuesCompiler
+
+
+class ValuesFirstViewSet(FirstViewSet):
+    expander_compiler_class = ExpanderValuesCompiler
+
+
+class RelatedThirdSerializer(ThirdSerializer):
+    extra = StringRelatedField()
+    second = SlugRelatedField(slug_field='content', read_only=True)
+
+
+class RelatedThirdViewSet(ThirdViewSet):
+    serializer_class = RelatedThirdSerializer
+
+
+class ValuesRelatedThirdViewSet(RelatedThirdViewSet):
+    expander_compiler_class = ExpanderValuesCompiler
+
+
+class AttachmentExtraSerializer(ExtraSerializer):
+    class Meta(ExtraSerializer.Meta):
+        fields = ('id', 'url', 'content', 'attachment')
+
+
+class AttachmentExtraViewSet(ExtraViewSet):
+    serializer_class = AttachmentExtraSerializer
+
+
+class ValuesAttachmentExtraViewSet(AttachmentExtraViewSet):
+    expander_compiler_class = ExpanderValuesCompiler
+
+
+class CompilerTestCase(APITestCase):
+    """
+    Tests rendering of list views from values() projections.
+    """
+
+    def get_data(self, viewset_class, expand, queries):
+        """
+        Helper method for rendering a list view with a number of queries.
+
+        The queries are not counted if queries is None.
+        """
+        view = viewset_class.as_view({'get': 'list'})
+        request = APIRequestFactory().get('/', {'expand': expand})
+
+        if queries is None:
+            return view(request).render().data
+
+        with self.assertNumQueries(queries):
+            response = view(request)
+            response.render()
+
+        return response.data
+
+    def test_collapsed(self):
+        self.assertEqual(
+            self.get_data(ThirdViewSet, '', 1),
+            self.get_data(ValuesThirdViewSet, '', 1),
+        )
+
+    def test_expanded(self):
+        self.assertEqual(
+            self.get_data(ThirdViewSet, 'extra,second.first', 1),
+            self.get_data(ValuesThirdViewSet, 'extra,second.first', 1),
+        )
+
+    def test_fallback_fields(self):
+        data = self.get_data(ValuesFirstViewSet, 'seconds', 3)
+
+        self.assertEqual(self.get_data(FirstViewSet, 'seconds', 2), data)
+        self.assertTrue(data[0]['seconds']['results'])
+
+    def test_related_fields(self):
+        data = self.get_data(ValuesRelatedThirdViewSet, '', None)
+
+        self.assertEqual(self.get_data(RelatedThirdViewSet, '', None), data)
+        third = ThirdModel.objects.get(pk=data[0]['id'])
+
+        self.assertEqual(str(third.extra), data[0]['extra'])
+        self.assertEqual(third.second.content, data[0]['second'])
+
+    def test_file_field(self):
+        ExtraModel.objects.update(attachment='files/attachment.txt')
+        data = self.get_data(ValuesAttachmentExtraViewSet, '', 2)
+
+        self.assertEqual(self.get_data(AttachmentExtraViewSet, '', 1), data)
+        self.assertTrue(data[0]['attachment'])
@@ -0,0 +1,40 @@
+from rest_framework.request import Request
+from rest_framework.test import APITestCase, APIRequestFactory
+
+from rest_framework_expander.adapters import ExpanderAdapter
+from rest_framework_expander.parsers import ExpanderParser
+from rest_framework_expander.utils import get_serializer_field_path, get_serializer_source_path
+from tests.serializers import ThirdSerializer
+
+
+class ExpanderContextTestCase(APITestCase):
+    """
+    Tests lookups of expander contexts by serializer.
+    """
+
+    def setUp(self):
+        request = Request(APIRequestFactory().get('/thirds/', {'expand': 'second.first'}))
+        self.serializer = ThirdSerializer(context={'request': request})
+
+        parser = ExpanderParser(ExpanderAdapter(self.serializer))
+        parser.max_depth = 2
+        self.expander = parser.parse()
+
+    def test_get_child_by_serializer(self):
+        second = self.serializer.fields['second']
+        first = second.fields['first']
+
+        self.assertIs(self.expander, self.expander.get_child_by_serializer(self.serializer))
+        self.assertIs(self.expander.children['second'], self.expander.get_child_by_serializer(second))
+        self.assertIs(self.expander.children['second'].children['first'], self.expander.get_child_by_serializer(first))
+        self.assertIsNone(self.expander.get_child_by_serializer(second.fields['extra']))
+
+    def test_serializer_paths(self):
+        first = self.serializer.fields['second'].fields['first']
+
+        self.assertEqual(('second', 'first'), get_serializer_field_path(first))
+        self.assertEqual(('second', 'first'), get_serializer_source_path(first))
+
+        first.bind('renamed', self.serializer)
+
+        self.assertEqual(('renamed',), get_serializer_field_path(first))
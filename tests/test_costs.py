@@ -0,0 +1,100 @@
+import pytest
+
+from rest_framework.request import Request
+from rest_framework.test import APITestCase, APIRequestFactory
+
+from rest_framework_expander.adapters import ListExpanderAdapter
+from rest_framework_expander.costs import ExpanderCostEstimator
+from rest_framework_expander.parsers import ExpanderParser
+from tests.models import ThirdModel
+from tests.serializers import FirstSerializer, ThirdSerializer
+from tests.views import ThirdViewSet
+
+
+pytestmark = pytest.mark.django_db()
+
+
+class WeightedFirstSerializer(FirstSerializer):
+    class Meta(FirstSerializer.Meta):
+        expansion_weights = {'seconds': 2}
+
+
+class RejectingCostEstimator(ExpanderCostEstimator):
+    max_cost = 2500
+    fail_on_cost_exceeded = True
+
+
+class CollapsingCostEstimator(ExpanderCostEstimator):
+    max_cost = 2500
+    fail_on_cost_exceeded = False
+
+
+class RejectingThirdViewSet(ThirdViewSet):
+    expander_cost_estimator_class = RejectingCostEstimator
+
+
+class CollapsingThirdViewSet(ThirdViewSet):
+    expander_cost_estimator_class = CollapsingCostEstimator
+
+
+class CostEstimatorTestCase(APITestCase):
+    """
+    Tests estimation and enforcement of expander costs.
+    """
+
+    def get_estimator(self, serializer_class, expand, rows=10):
+        """
+        Helper method for creating an estimator for a parsed request.
+        """
+        request = Request(APIRequestFactory().get('/', {'expand': expand}))
+        serializer = serializer_class(serializer_class.Meta.model.objects.all(), many=True, context={'request': request})
+        adapter = ListExpanderAdapter(serializer)
+        adapter.context['expander'] = ExpanderParser(adapter).parse()
+
+        return ExpanderCostEstimator(adapter.context['expander'], rows)
+
+    def get_response(self, viewset_class, expand, fields=None, **kwargs):
+        """
+        Helper method for requesting a view of thirds.
+        """
+        params = {'expand': expand}
+
+        if fields is not None:
+            params['fields'] = fields
+
+        view = viewset_class.as_view({'get': 'retrieve' if kwargs else 'list'})
+        return view(APIRequestFactory().get('/', params), **kwargs)
+
+    def test_single_relations(self):
+        self.assertEqual(30, self.get_estimator(ThirdSerializer, 'extra,second').estimate())
+
+    def test_weighted_list_expansion(self):
+        self.assertEqual(10 + 10 * 3 * 2, self.get_estimator(WeightedFirstSerializer, 'seconds').estimate())
+
+    def test_rejected(self):
+        response = self.get_response(RejectingThirdViewSet, 'extra,second')
+
+        self.assertEqual(400, response.status_code)
+        self.assertEqual(3000, response.data['cost'])
+        self.assertEqual(2500, response.data['max_cost'])
+
+    def test_collapsed(self):
+        response = self.get_response(CollapsingThirdViewSet, 'extra,second')
+        expanded = [name for name in ('extra', 'second') if 'content' in response.data[0][name]]
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(1, len(expanded))
+
+    def test_collapsed_with_fields(self):
+        response = self.get_response(CollapsingThirdViewSet, 'extra,second', fields='id,extra,second')
+
+        self.assertEqual(200, response.status_code)
+
+        for item in response.data:
+            self.assertEqual({'id', 'extra', 'second'}, set(item))
+
+    def test_detail_within_budget(self):
+        response = self.get_response(RejectingThirdViewSet, 'extra,second', pk=ThirdModel.objects.first().pk)
+
+        self.assertEqual(200, response.status_code)
+        self.assertIn('content', response.data['second'])
@@ -0,0 +1,79 @@
+import pytest
+
+from rest_framework.test import APIRequestFactory, APITestCase
+
+from tests.models import ExtraModel, ThirdModel
+from tests.serializers import ExtraSerializer, SecondSerializer, ThirdSerializer
+from tests.views import ThirdViewSet
+
+
+pytestmark = pytest.mark.django_db()
+
+
+class VersionedExtraSerializer(ExtraSerializer):
+    class Meta(ExtraSerializer.Meta):
+        version_field = 'content'
+
+
+class VersionedThirdSerializer(ThirdSerializer):
+    extra = VersionedExtraSerializer(read_only=True)
+
+    class Meta(ThirdSerializer.Meta):
+        version_field = 'content'
+
+
+class VersionedThirdViewSet(ThirdViewSet):
+    serializer_class = VersionedThirdSerializer
+    expander_etag = True
+
+
+class UnversionedThirdSerializer(VersionedThirdSerializer):
+    second = SecondSerializer(read_only=True)
+
+
+class UnversionedThirdViewSet(VersionedThirdViewSet):
+    serializer_class = UnversionedThirdSerializer
+
+
+class ETagTestCase(APITestCase):
+    """
+    Tests conditional list requests.
+    """
+
+    def get_response(self, viewset_class, expand, etag=None):
+        """
+        Helper method for requesting a list view.
+        """
+        headers = {'HTTP_IF_NONE_MATCH': etag} if etag else {}
+        request = APIRequestFactory().get('/', {'expand': expand}, **headers)
+        return viewset_class.as_view({'get': 'list'})(request)
+
+    def test_not_modified(self):
+        etag = self.get_response(VersionedThirdViewSet, 'extra')['ETag']
+
+        with self.assertNumQueries(2):
+            response = self.get_response(VersionedThirdViewSet, 'extra', etag)
+
+        self.assertEqual(304, response.status_code)
+        self.assertEqual(etag, response['ETag'])
+
+    def test_modified(self):
+        etag = self.get_response(VersionedThirdViewSet, 'extra')['ETag']
+        ExtraModel.objects.filter(pk=ThirdModel.objects.first().extra_id).update(content='~')
+        response = self.get_response(VersionedThirdViewSet, 'extra', etag)
+
+        self.assertEqual(200, response.status_code)
+        self.assertNotEqual(etag, response['ETag'])
+
+    def test_expansion(self):
+        collapsed = self.get_response(VersionedThirdViewSet, '')['ETag']
+        expanded = self.get_response(VersionedThirdViewSet, 'extra')['ETag']
+
+        self.assertNotEqual(collapsed, expanded)
+        self.assertEqual(200, self.get_response(VersionedThirdViewSet, 'extra', collapsed).status_code)
+
+    def test_unversioned(self):
+        response = self.get_response(UnversionedThirdViewSet, 'second')
+
+        self.assertEqual(200, response.status_code)
+        self.assertFalse(response.has_header('ETag'))
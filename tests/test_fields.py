@@ -0,0 +1,50 @@
+import pytest
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+
+
+pytestmark = pytest.mark.django_db()
+
+
+class SparseFieldsTestCase(APITestCase):
+    """
+    Tests sparse fieldsets of list requests.
+    """
+
+    def get_response(self, params):
+        """
+        Helper method for requesting thirds while capturing the queries.
+        """
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/thirds/', params)
+
+        return response, [query['sql'] for query in queries]
+
+    def test_fields_of_nodes(self):
+        response, queries = self.get_response({'expand': 'second', 'fields': 'id,second.content'})
+
+        for result in response.data:
+            self.assertEqual(['id', 'second'], list(result))
+            self.assertEqual(['content'], list(result['second']))
+
+        self.assertEqual(1, len(queries))
+        self.assertNotIn('"tests_thirdmodel"."content"', queries[0])
+        self.assertNotIn('"tests_secondmodel"."extra_id"', queries[0])
+
+    def test_unlisted_expansion_not_joined(self):
+        response, queries = self.get_response({'expand': 'extra,second', 'fields': 'id,extra'})
+
+        for result in response.data:
+            self.assertEqual(['id', 'extra'], list(result))
+            self.assertIn('content', result['extra'])
+
+        self.assertNotIn('tests_secondmodel', queries[0])
+
+    def test_collapsed_field_paths_ignored(self):
+        response, queries = self.get_response({'fields': 'url,second.content'})
+
+        for result in response.data:
+            self.assertEqual(['url', 'second'], list(result))
+            self.assertEqual(['id', 'url'], list(result['second']))
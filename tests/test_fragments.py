@@ -0,0 +1,103 @@
+import json
+import pytest
+
+from django.test import override_settings
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory, APITestCase
+
+from rest_framework_expander import caches
+from rest_framework_expander.fragments import ExpanderFragmentCache, JSONFragment, encode_fragment
+from rest_framework_expander.renderers import ExpanderFragmentJSONRenderer
+from rest_framework_expander.serializers import ExpanderSerializerMixin
+from tests.serializers import ExtraSerializer, SecondSerializer, ThirdSerializer
+from tests.views import ThirdViewSet
+
+
+pytestmark = pytest.mark.django_db()
+
+
+class ContentExtraSerializer(ExtraSerializer):
+    class Meta(ExtraSerializer.Meta):
+        collapsed_fields = ('id', 'url', 'content')
+
+
+class ContentThirdSerializer(ThirdSerializer):
+    extra = ContentExtraSerializer(read_only=True)
+
+
+class FragmentThirdViewSet(ThirdViewSet):
+    renderer_classes = (ExpanderFragmentJSONRenderer,)
+
+
+class FragmentTestCase(APITestCase):
+    """
+    Tests pre-encoded fragments of collapsed representations.
+    """
+
+    def setUp(self):
+        self.fragment_cache = ExpanderSerializerMixin.fragment_cache
+        ExpanderSerializerMixin.fragment_cache = ExpanderFragmentCache(100)
+
+    def tearDown(self):
+        ExpanderSerializerMixin.fragment_cache = self.fragment_cache
+
+    def get_content(self, viewset_class, expand):
+        """
+        Helper method for rendering a list view.
+        """
+        request = APIRequestFactory().get('/', {'expand': expand})
+        response = viewset_class.as_view({'get': 'list'})(request)
+        return response.render().content
+
+    def test_render(self):
+        data = {'a': JSONFragment('{"id":1}'), 'b': [JSONFragment('2'), '\u0000']}
+        content = ExpanderFragmentJSONRenderer().render(data)
+
+        self.assertEqual(json.loads(content.decode('utf-8')), {'a': {'id': 1}, 'b': [2, '\u0000']})
+
+    def test_render_encoded(self):
+        data = [encode_fragment({'content': '\u2028'}), JSONFragment(b'[1]')]
+        content = ExpanderFragmentJSONRenderer().render(data)
+
+        self.assertEqual(JSONRenderer().render([{'content': '\u2028'}, [1]]), content)
+
+    def test_same_output(self):
+        for expand in ('', 'second', 'extra,second'):
+            self.assertEqual(self.get_content(ThirdViewSet, expand), self.get_content(FragmentThirdViewSet, expand))
+
+    def test_shared_between_requests(self):
+        self.get_content(FragmentThirdViewSet, 'second')
+        size = len(ExpanderSerializerMixin.fragment_cache)
+        self.get_content(FragmentThirdViewSet, 'second')
+
+        self.assertLess(0, size)
+        self.assertEqual(size, len(ExpanderSerializerMixin.fragment_cache))
+        self.assertEqual(size, ExpanderSerializerMixin.fragment_cache.hits)
+
+    def test_fragmentable(self):
+        context = {'expander_fragments': True}
+
+        self.assertTrue(ThirdSerializer(context=context).fields['extra'].is_fragmented())
+        self.assertFalse(ContentThirdSerializer(context=context).fields['extra'].is_fragmented())
+        self.assertFalse(ThirdSerializer().fields['extra'].is_fragmented())
+
+    def test_format_suffix(self):
+        view = FragmentThirdViewSet.as_view({'get': 'list'})
+        view(APIRequestFactory().get('/', {'expand': 'extra'}))
+        response = view(APIRequestFactory().get('/', {'expand': 'extra'}), format='json').render()
+
+        for result in json.loads(response.content.decode('utf-8')):
+            self.assertTrue(result['second']['url'].endswith('.json'))
+
+    @override_settings(REST_FRAMEWORK_EXPANDER={'REPRESENTATION_CACHE': 'default'})
+    def test_not_shared_with_plain_renderer(self):
+        caches.representation_cache.cache.clear()
+        SecondSerializer.Meta.cache_representations = True
+
+        try:
+            fragmented = self.get_content(FragmentThirdViewSet, 'second')
+            plain = self.get_content(ThirdViewSet, 'second')
+        finally:
+            del SecondSerializer.Meta.cache_representations
+
+        self.assertEqual(json.loads(fragmented.decode('utf-8')), json.loads(plain.decode('utf-8')))
@@ -0,0 +1,89 @@
+import pytest
+
+from django.db import connection
+from django.test import override_settings
+from rest_framework.test import APITestCase, APIRequestFactory
+
+from rest_framework_expander.metrics import metrics_recorded
+from tests.serializers import ExtraSerializer, FirstSerializer
+from tests.views import ExtraViewSet, FirstViewSet, ThirdViewSet
+
+
+pytestmark = pytest.mark.django_db()
+
+
+class ExtraFirstsSerializer(ExtraSerializer):
+    firsts = FirstSerializer(many=True, read_only=True, source='firstmodel_set')
+
+    class Meta(ExtraSerializer.Meta):
+        fields = ('id', 'url', 'content', 'firsts')
+
+
+class ExtraFirstsViewSet(ExtraViewSet):
+    serializer_class = ExtraFirstsSerializer
+
+
+@override_settings(REST_FRAMEWORK_EXPANDER={'METRICS': True, 'METRICS_SERVER_TIMING': True})
+class MetricsTestCase(APITestCase):
+    """
+    Tests metrics of list requests.
+    """
+
+    def setUp(self):
+        self.recorded = list()
+        metrics_recorded.connect(self.receive)
+
+    def tearDown(self):
+        metrics_recorded.disconnect(self.receive)
+
+    def receive(self, sender, metrics, **kwargs):
+        self.recorded.append(metrics)
+
+    def get_response(self, viewset_class, expand):
+        """
+        Helper method for requesting a list view.
+        """
+        view = viewset_class.as_view({'get': 'list'})
+        return view(APIRequestFactory().get('/', {'expand': expand}))
+
+    def test_phases(self):
+        response = self.get_response(ThirdViewSet, 'extra,second')
+        metrics = self.recorded[0]
+
+        self.assertEqual(['parse', 'optimize', 'fetch', 'serialize', 'total'], list(metrics.phases))
+        self.assertEqual(1, metrics.phases['fetch']['queries'])
+        self.assertEqual(0, metrics.phases['serialize']['queries'])
+        self.assertIn('fetch;dur=', response['Server-Timing'])
+
+    def test_nodes(self):
+        response = self.get_response(FirstViewSet, 'seconds')
+        metrics = self.recorded[0]
+
+        self.assertEqual(1, metrics.nodes['']['queries'])
+        self.assertEqual(1, metrics.nodes['seconds']['queries'])
+        self.assertEqual(len(response.data), metrics.nodes['']['rows'])
+        self.assertEqual(len(response.data), metrics.nodes['extra']['rows'])
+
+    def test_prefetch_nodes(self):
+        response = self.get_response(ExtraFirstsViewSet, 'firsts.extra')
+        metrics = self.recorded[0]
+
+        self.assertEqual(1, metrics.nodes['']['queries'])
+        self.assertEqual(1, metrics.nodes['firsts']['queries'])
+        self.assertEqual(0, metrics.phases['optimize']['queries'])
+        self.assertEqual(0, metrics.phases['serialize']['queries'])
+        self.assertTrue(any(result['firsts'] for result in response.data))
+
+    def test_queries_not_logged(self):
+        queries_log = list(connection.queries_log)
+        self.get_response(ThirdViewSet, 'extra')
+
+        self.assertEqual(1, self.recorded[0].phases['total']['queries'])
+        self.assertEqual(queries_log, list(connection.queries_log))
+
+    def test_disabled(self):
+        with override_settings(REST_FRAMEWORK_EXPANDER={'METRICS': False}):
+            response = self.get_response(ThirdViewSet, 'extra')
+
+        self.assertFalse(self.recorded)
+        self.assertNotIn('Server-Timing', response)
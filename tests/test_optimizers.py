@@ -0,0 +1,286 @@
+import os
+import tempfile
+
+from threading import current_thread
+from django.db import connections, transaction
+from rest_framework.request import Request
+from rest_framework.test import APITestCase, APIRequestFactory
+
+from rest_framework_expander.adapters import ListExpanderAdapter
+from rest_framework_expander.optimizers import (
+    ConcurrentRelationExpanderOptimizerSet, ExpanderOptimizer, ExpanderPrefetch, GenericExpanderOptimizer,
+    ListExpanderOptimizer, PrefetchExpanderOptimizerSet, RelationExpanderOptimizerSet, SelectExpanderOptimizerSet, is_compilable
+)
+from rest_framework_expander.parsers import ExpanderParser
+from tests.models import ExtraModel, FirstModel, SecondModel, TaggedModel, ThirdModel
+from tests.serializers import ExtraSerializer, FirstSerializer, SecondSerializer, TaggedSerializer, ThirdSerializer
+
+
+class ExtraFirstsSerializer(ExtraSerializer):
+    firsts = FirstSerializer(many=True, read_only=True, source='firstmodel_set')
+
+    class Meta(ExtraSerializer.Meta):
+        fields = ('id', 'url', 'content', 'firsts')
+
+
+class ExtraBranchesSerializer(ExtraSerializer):
+    firsts = FirstSerializer(many=True, read_only=True, source='firstmodel_set')
+    seconds = SecondSerializer(many=True, read_only=True, source='secondmodel_set')
+
+    class Meta(ExtraSerializer.Meta):
+        fields = ('id', 'url', 'content', 'firsts', 'seconds')
+
+
+class ThreadRecordingOptimizerSet(ConcurrentRelationExpanderOptimizerSet):
+    """
+    Records the threads prefetching the branches.
+    """
+
+    def prefetch_branch(self, objects, lookups):
+        self.threads.add(current_thread())
+        super(ThreadRecordingOptimizerSet, self).prefetch_branch(objects, lookups)
+
+
+class CustomExpanderOptimizer(ExpanderOptimizer):
+    def to_optimized_queryset(self, queryset):
+        return queryset.order_by('-pk')
+
+
+class CustomExpanderOptimizerSet(PrefetchExpanderOptimizerSet):
+    second = CustomExpanderOptimizer()
+
+
+class ThirdExtraSerializer(ThirdSerializer):
+    class Meta(ThirdSerializer.Meta):
+        fields = ('id', 'url', 'extra')
+
+
+class OptimizerTestCase(APITestCase):
+    """
+    Tests compilation of optimizer plans.
+    """
+
+    def get_optimizer(self, optimizer_class, expand, serializer_class=ThirdSerializer):
+        """
+        Helper method for creating an optimizer for a parsed request.
+        """
+        model = serializer_class.Meta.model
+        request = Request(APIRequestFactory().get('/', {'expand': expand}))
+        serializer = serializer_class(model.objects.all(), many=True, context={'request': request})
+        adapter = ListExpanderAdapter(serializer)
+
+        parser = ExpanderParser(adapter)
+        parser.max_depth = 2
+        adapter.context['expander'] = parser.parse()
+
+        return optimizer_class(adapter)
+
+    def test_prefetch_plan(self):
+        plan = self.get_optimizer(PrefetchExpanderOptimizerSet, 'extra,second.first').get_plan(ThirdModel)
+
+        self.assertEqual(('extra', 'second', 'second__first'), tuple(sorted(plan.prefetch_related)))
+        self.assertEqual((), plan.select_related)
+
+    def test_select_plan(self):
+        plan = self.get_optimizer(SelectExpanderOptimizerSet, 'second.first').get_plan(ThirdModel)
+
+        self.assertEqual(('second', 'second__first'), plan.select_related)
+        self.assertEqual((), plan.prefetch_related)
+
+    def test_plan_shared_between_requests(self):
+        first = self.get_optimizer(PrefetchExpanderOptimizerSet, 'second').get_plan(ThirdModel)
+        second = self.get_optimizer(PrefetchExpanderOptimizerSet, 'second').get_plan(ThirdModel)
+
+        self.assertIs(first, second)
+
+    def test_plan_without_optimizers(self):
+        self.get_optimizer(PrefetchExpanderOptimizerSet, 'second').get_plan(ThirdModel)
+
+        optimizer = self.get_optimizer(PrefetchExpanderOptimizerSet, 'second')
+        optimizer.to_optimized_queryset(ThirdModel.objects.all())
+
+        self.assertFalse(hasattr(optimizer, '_optimizers'))
+
+    def test_custom_optimizer_not_compiled(self):
+        optimizer = self.get_optimizer(CustomExpanderOptimizerSet, 'second')
+        queryset = optimizer.to_optimized_queryset(ThirdModel.objects.all())
+
+        self.assertIsNone(optimizer.get_plan(ThirdModel))
+        self.assertEqual(['-pk'], list(queryset.query.order_by))
+
+    def test_relation_plan_of_foreign_keys(self):
+        plan = self.get_optimizer(RelationExpanderOptimizerSet, 'extra,second.first').get_plan(ThirdModel)
+
+        self.assertEqual(('extra', 'second', 'second__first'), tuple(sorted(plan.select_related)))
+        self.assertEqual((), plan.prefetch_related)
+
+    def test_relation_plan_of_reverse_relation(self):
+        optimizer = self.get_optimizer(RelationExpanderOptimizerSet, 'firsts.extra', ExtraFirstsSerializer)
+        plan = optimizer.get_plan(ExtraModel)
+
+        self.assertEqual((), plan.select_related)
+        self.assertEqual(1, len(plan.prefetch_related))
+
+        prefetch = plan.prefetch_related[0]
+
+        self.assertIsInstance(prefetch, ExpanderPrefetch)
+        self.assertEqual('firstmodel_set', prefetch.lookup)
+        self.assertEqual(('extra',), prefetch.plan.select_related)
+
+    def test_relation_queries_of_reverse_relation(self):
+        optimizer = self.get_optimizer(RelationExpanderOptimizerSet, 'firsts.extra', ExtraFirstsSerializer)
+
+        with self.assertNumQueries(2):
+            queryset = optimizer.to_optimized_queryset(ExtraModel.objects.all())
+            optimizer.adapter.instance = optimizer.to_optimized_objects(list(queryset))
+            data = optimizer.adapter.serializer.data
+
+        for result in data:
+            for first in result['firsts']:
+                self.assertIn('content', first['extra'])
+
+    def test_relation_plan_of_generic_foreign_key(self):
+        optimizer = self.get_optimizer(RelationExpanderOptimizerSet, 'content_object', TaggedSerializer)
+        plan = optimizer.get_plan(TaggedModel)
+
+        self.assertIsInstance(optimizer.optimizers['content_object'], GenericExpanderOptimizer)
+        self.assertEqual((), plan.prefetch_related)
+        self.assertEqual([('content_object',)], [path for path, template in plan.objects])
+
+    def test_relation_queries_of_generic_foreign_key(self):
+        optimizer = self.get_optimizer(RelationExpanderOptimizerSet, 'content_object', TaggedSerializer)
+        queryset = optimizer.to_optimized_queryset(TaggedModel.objects.all())
+
+        with self.assertNumQueries(2):
+            optimizer.adapter.instance = optimizer.to_optimized_objects(list(queryset))
+            data = optimizer.adapter.serializer.data
+
+        for result in data:
+            self.assertIn('content', result['content_object'])
+
+    def test_relation_plan_of_list_below_reverse_relation(self):
+        optimizer = self.get_optimizer(RelationExpanderOptimizerSet, 'firsts.seconds', ExtraFirstsSerializer)
+        plan = optimizer.get_plan(ExtraModel)
+
+        self.assertEqual((), plan.prefetch_related[0].plan.objects)
+        self.assertEqual([('firsts', 'seconds')], [path for path, template in plan.objects])
+        self.assertIsInstance(plan.objects[0][1], ListExpanderOptimizer)
+
+    def test_relation_queries_of_list_below_reverse_relation(self):
+        optimizer = self.get_optimizer(RelationExpanderOptimizerSet, 'firsts.seconds', ExtraFirstsSerializer)
+
+        with self.assertNumQueries(3):
+            queryset = optimizer.to_optimized_queryset(ExtraModel.objects.all())
+            optimizer.adapter.instance = optimizer.to_optimized_objects(list(queryset))
+            data = optimizer.adapter.serializer.data
+
+        self.assertTrue(any(first['seconds']['results'] for result in data for first in result['firsts']))
+
+    def test_relation_plan_columns(self):
+        plan = self.get_optimizer(RelationExpanderOptimizerSet, 'extra', ThirdExtraSerializer).get_plan(ThirdModel)
+
+        self.assertEqual(('id', 'extra', 'extra__id', 'extra__content'), plan.only)
+
+    def test_relation_queries_with_columns(self):
+        optimizer = self.get_optimizer(RelationExpanderOptimizerSet, 'extra', ThirdExtraSerializer)
+
+        with self.assertNumQueries(1):
+            queryset = optimizer.to_optimized_queryset(ThirdModel.objects.all())
+            optimizer.adapter.instance = optimizer.to_optimized_objects(list(queryset))
+            data = optimizer.adapter.serializer.data
+
+        for result in data:
+            self.assertNotIn('content', result)
+            self.assertIn('content', result['extra'])
+
+    def test_concurrent_branches(self):
+        plan = self.get_optimizer(ConcurrentRelationExpanderOptimizerSet, 'firsts,seconds', ExtraBranchesSerializer).get_plan(ExtraModel)
+        branches = ConcurrentRelationExpanderOptimizerSet().get_branches(plan)
+
+        self.assertEqual(['firstmodel_set', 'secondmodel_set'], sorted(branch[0].lookup for branch in branches))
+
+    def test_concurrent_queries_in_transaction(self):
+        optimizer = self.get_optimizer(ConcurrentRelationExpanderOptimizerSet, 'firsts,seconds', ExtraBranchesSerializer)
+
+        with self.assertNumQueries(3):
+            queryset = optimizer.to_optimized_queryset(ExtraModel.objects.all())
+            optimizer.adapter.instance = optimizer.to_optimized_objects(list(queryset))
+            data = optimizer.adapter.serializer.data
+
+        self.assertTrue(any(result['firsts'] for result in data))
+        self.assertTrue(any(result['seconds'] for result in data))
+
+    def test_compilable(self):
+        self.assertTrue(is_compilable(ConcurrentRelationExpanderOptimizerSet, 'to_optimized_queryset'))
+        self.assertTrue(is_compilable(ThreadRecordingOptimizerSet, 'to_optimized_objects'))
+        self.assertFalse(is_compilable(CustomExpanderOptimizer, 'to_optimized_queryset'))
+
+
+class ConcurrentOptimizerTestCase(APITestCase):
+    """
+    Tests concurrent optimizers on a database file, which is shared by the
+    connections of all threads.
+    """
+    alias = 'concurrent'
+
+    def setUp(self):
+        self.database_name = os.path.join(tempfile.gettempdir(), 'expander-concurrent-{}.sqlite3'.format(os.getpid()))
+        connections.databases[self.alias] = {'ENGINE': 'django.db.backends.sqlite3', 'NAME': self.database_name}
+
+        with connections[self.alias].schema_editor() as editor:
+            for model in (ExtraModel, FirstModel, SecondModel):
+                editor.create_model(model)
+                model.objects.using(self.alias).bulk_create(list(model.objects.all()))
+
+    def tearDown(self):
+        connections[self.alias].close()
+        del connections.databases[self.alias]
+        os.remove(self.database_name)
+
+    def get_optimizer(self, optimizer_class, expand):
+        """
+        Helper method for creating an optimizer for a parsed request.
+        """
+        request = Request(APIRequestFactory().get('/', {'expand': expand}))
+        queryset = ExtraModel.objects.using(self.alias)
+        serializer = ExtraBranchesSerializer(queryset, many=True, context={'request': request})
+        adapter = ListExpanderAdapter(serializer)
+        adapter.context['expander'] = ExpanderParser(adapter).parse()
+
+        return optimizer_class(adapter)
+
+    def get_data(self, optimizer):
+        """
+        Helper method for serializing the objects loaded with optimizer.
+        """
+        queryset = optimizer.to_optimized_queryset(ExtraModel.objects.using(self.alias))
+        optimizer.adapter.instance = optimizer.to_optimized_objects(list(queryset))
+        return optimizer.adapter.serializer.data
+
+    def test_branches_on_pool(self):
+        expected = self.get_data(self.get_optimizer(RelationExpanderOptimizerSet, 'firsts.extra,seconds'))
+
+        optimizer = self.get_optimizer(ThreadRecordingOptimizerSet, 'firsts.extra,seconds')
+        optimizer.threads = set()
+        queryset = optimizer.to_optimized_queryset(ExtraModel.objects.using(self.alias))
+
+        with self.assertNumQueries(1, using=self.alias):
+            objects = list(queryset)
+
+        with self.assertNumQueries(0, using=self.alias):
+            optimizer.adapter.instance = optimizer.to_optimized_objects(objects)
+            data = optimizer.adapter.serializer.data
+
+        self.assertEqual(2, len(optimizer.threads))
+        self.assertNotIn(current_thread(), optimizer.threads)
+        self.assertEqual(expected, data)
+
+    def test_sequential_in_transaction(self):
+        optimizer = self.get_optimizer(ThreadRecordingOptimizerSet, 'firsts,seconds')
+        optimizer.threads = set()
+
+        with transaction.atomic(using=self.alias):
+            with self.assertNumQueries(3, using=self.alias):
+                self.get_data(optimizer)
+
+        self.assertEqual(set([current_thread()]), optimizer.threads)
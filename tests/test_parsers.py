@@ -133,3 +133,34 @@ class ExpansionParserTestCase(APITestCase):
         expander = parser.parse()
         self.assertEqual(1, self.child_count(expander))
         self.assertEqual(0, self.child_count(expander, 'extra'))
+
+    def test_field_paths(self):
+        request = Request(APIRequestFactory().get('/thirds/', {
+            'expand': 'extra,second.first',
+            'fields': 'id,second.first.content',
+        }))
+        serializer = ThirdSerializer(context={'request': request})
+        parser = ExpanderParser(ExpanderAdapter(serializer))
+        parser.max_depth = 2
+
+        expander = parser.parse()
+
+        self.assertEqual(frozenset(('id', 'second')), expander.fields)
+        self.assertEqual(['second'], list(expander.children))
+        self.assertEqual(frozenset(('first',)), expander.children['second'].fields)
+        self.assertEqual(frozenset(('content',)), expander.children['second'].children['first'].fields)
+
+    def test_field_paths_depth_breach(self):
+        request = Request(APIRequestFactory().get('/thirds/', {
+            'expand': 'second',
+            'fields': 'id,second.extra.content',
+        }))
+        serializer = ThirdSerializer(context={'request': request})
+        parser = ExpanderParser(ExpanderAdapter(serializer))
+        parser.max_depth = 1
+
+        parser.fail_on_depth_breached = True
+        self.assertRaises(ExpanderDepthBreached, parser.parse)
+
+        parser.fail_on_depth_breached = False
+        self.assertEqual(frozenset(('extra',)), parser.parse().children['second'].fields)
@@ -0,0 +1,91 @@
+from rest_framework.request import Request
+from rest_framework.test import APITestCase, APIRequestFactory
+
+from rest_framework_expander.adapters import ExpanderAdapter
+from rest_framework_expander.parsers import ExpanderParser
+from rest_framework_expander.plans import ExpanderPlan, ExpanderPlanCache
+from tests.serializers import SecondSerializer, ThirdSerializer
+
+
+class ExpanderPlanCacheTestCase(APITestCase):
+    """
+    Tests ExpanderPlanCache.
+    """
+
+    def test_counters(self):
+        cache = ExpanderPlanCache(2)
+        plan = ExpanderPlan()
+
+        self.assertIsNone(cache.get('a'))
+        cache.set('a', plan)
+        self.assertIs(plan, cache.get('a'))
+
+        self.assertEqual(1, cache.hits)
+        self.assertEqual(1, cache.misses)
+
+    def test_eviction(self):
+        cache = ExpanderPlanCache(2)
+
+        cache.set('a', ExpanderPlan())
+        cache.set('b', ExpanderPlan())
+        cache.get('a')
+        cache.set('c', ExpanderPlan())
+
+        self.assertEqual(2, len(cache))
+        self.assertIsNotNone(cache.get('a'))
+        self.assertIsNone(cache.get('b'))
+        self.assertIsNotNone(cache.get('c'))
+
+    def test_disabled(self):
+        cache = ExpanderPlanCache(0)
+        cache.set('a', ExpanderPlan())
+
+        self.assertEqual(0, len(cache))
+        self.assertIsNone(cache.get('a'))
+
+
+class ParserPlanCacheTestCase(APITestCase):
+    """
+    Tests sharing of plans between parsed requests.
+    """
+
+    def setUp(self):
+        self.cache = ExpanderPlanCache(16)
+
+    def parse_expand(self, expand):
+        """
+        Helper method for running the parser with a private cache.
+        """
+        request = Request(APIRequestFactory().get('/thirds/', {'expand': expand}))
+        serializer = ThirdSerializer(context={'request': request})
+        parser = ExpanderParser(ExpanderAdapter(serializer))
+        parser.plan_cache = self.cache
+
+        return parser.parse()
+
+    def test_normalized_expansion(self):
+        first = self.parse_expand('extra,second')
+        second = self.parse_expand('second,extra,second')
+
+        self.assertEqual(1, self.cache.hits)
+        self.assertEqual(1, self.cache.misses)
+        self.assertIs(first.plan, second.plan)
+
+    def test_empty_expansion(self):
+        plans = [self.parse_expand('').plan for index in range(3)]
+
+        self.assertEqual(2, self.cache.hits)
+        self.assertEqual(1, self.cache.misses)
+        self.assertIs(plans[0], plans[2])
+
+    def test_request_data_not_shared(self):
+        first = self.parse_expand('second')
+        second = self.parse_expand('second')
+
+        self.assertIsNot(first.children['second'], second.children['second'])
+        self.assertIsNot(first.children['second'].data, second.children['second'].data)
+
+    def test_lazy_serializer(self):
+        expander = self.parse_expand('second')
+
+        self.assertIsInstance(expander.children['second'].serializer, SecondSerializer)
@@ -0,0 +1,51 @@
+from django.contrib.contenttypes.models import ContentType
+from rest_framework.test import APITestCase
+
+from rest_framework_expander.relations import PKObject, get_accessor
+from tests.models import ExtraModel, FirstModel, TaggedModel
+
+
+class AccessorTestCase(APITestCase):
+    """
+    Tests relation accessors.
+    """
+
+    def test_foreign_key(self):
+        first = FirstModel.objects.first()
+        obj = get_accessor(FirstModel, 'extra')(first)
+
+        self.assertIsInstance(obj, PKObject)
+        self.assertIs(ExtraModel._meta, obj._meta)
+        self.assertEqual(first.extra_id, obj.pk)
+        self.assertEqual(first.extra_id, obj.id)
+
+    def test_null_foreign_key(self):
+        first = FirstModel(content='null')
+
+        self.assertIsNone(get_accessor(FirstModel, 'extra')(first))
+
+    def test_not_a_relation(self):
+        self.assertIsNone(get_accessor(FirstModel, 'content'))
+        self.assertIsNone(get_accessor(FirstModel, 'alpaca'))
+
+    def test_reused(self):
+        self.assertIs(get_accessor(FirstModel, 'extra'), get_accessor(FirstModel, 'extra'))
+
+    def test_slots(self):
+        obj = get_accessor(FirstModel, 'extra')(FirstModel.objects.first())
+
+        self.assertRaises(AttributeError, setattr, obj, 'content', 'slotted')
+
+    def test_constructor(self):
+        first = FirstModel.objects.first()
+        obj = PKObject(first, 'extra')
+
+        self.assertIs(ExtraModel._meta, obj._meta)
+        self.assertEqual(first.extra_id, obj.pk)
+        self.assertRaises(TypeError, PKObject, first, 'content')
+
+    def test_stale_content_type(self):
+        content_type = ContentType.objects.create(app_label='tests', model='removedmodel')
+        tagged = TaggedModel(content='stale', content_type=content_type, object_id=1)
+
+        self.assertIsNone(get_accessor(TaggedModel, 'content_object')(tagged))
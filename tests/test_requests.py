@@ -1,14 +1,31 @@
 import pytest
 
+from django.contrib.contenttypes.models import ContentType
+from django.db.models.signals import pre_save
 from django.utils.http import urlencode
-from rest_framework.test import APITestCase
+from rest_framework.test import APIRequestFactory, APITestCase
 
-from tests.models import ExtraModel, SecondModel, ThirdModel
+from tests.models import ExtraModel, FirstModel, SecondModel, ThirdModel
+from tests.serializers import SecondSerializer
+from tests.views import SecondViewSet
 
 
 pytestmark = pytest.mark.django_db()
 
 
+class SecondFirstSerializer(SecondSerializer):
+    class Meta(SecondSerializer.Meta):
+        fields = ('id', 'url', 'first')
+
+
+class SecondFirstViewSet(SecondViewSet):
+    serializer_class = SecondFirstSerializer
+
+
+def set_saved_content(sender, instance, **kwargs):
+    instance.content = 'saved'
+
+
 class RequestTestCase(APITestCase):
     """
     Provides assertion methods for request tests.
@@ -58,7 +75,7 @@ class ListRequestTestCase(RequestTestCase):
             self.assertCollapsed(result['second'])
 
     def test_expansion_of_single_item(self):
-        with self.assertNumQueries(2):
+        with self.assertNumQueries(1):
             response = self.client.get('/thirds/', {
                 'expand': 'extra',
             })
@@ -71,7 +88,7 @@ class ListRequestTestCase(RequestTestCase):
             self.assertCollapsed(result['second'])
 
     def test_expansion_of_multiple_items(self):
-        with self.assertNumQueries(3):
+        with self.assertNumQueries(1):
             response = self.client.get('/thirds/', {
                 'expand': 'extra,second',
             })
@@ -83,6 +100,55 @@ class ListRequestTestCase(RequestTestCase):
             self.assertExpanded(result['extra'])
             self.assertExpanded(result['second'])
 
+    def test_expansion_of_list(self):
+        first = FirstModel.objects.first()
+
+        for i in range(5):
+            SecondModel.objects.create(content=str(i), extra=first.extra, first=first)
+
+        with self.assertNumQueries(2):
+            response = self.client.get('/firsts/', {
+                'expand': 'seconds',
+            })
+
+        self.assertTrue(response.data)
+        self.assertEqual(3, len(response.data[0]['seconds']['results']))
+
+        for result in response.data:
+            self.assertExpanded(result)
+            self.assertTrue(result['seconds']['results'])
+            self.assertLessEqual(len(result['seconds']['results']), 3)
+
+            for item in result['seconds']['results']:
+                self.assertExpanded(item)
+                self.assertCollapsed(item['first'])
+
+    def test_collapsed_generic_relation(self):
+        ContentType.objects.get_for_model(ExtraModel)
+
+        with self.assertNumQueries(1):
+            response = self.client.get('/tagged/')
+
+        self.assertTrue(response.data)
+
+        for result in response.data:
+            self.assertExpanded(result)
+            self.assertCollapsed(result['content_object'])
+
+    def test_expansion_of_generic_relation(self):
+        ContentType.objects.get_for_model(ExtraModel)
+
+        with self.assertNumQueries(2):
+            response = self.client.get('/tagged/', {
+                'expand': 'content_object',
+            })
+
+        self.assertTrue(response.data)
+
+        for result in response.data:
+            self.assertExpanded(result)
+            self.assertExpanded(result['content_object'])
+
 
 class DetailRequestTestCaseMixin():
     """
@@ -128,6 +194,14 @@ class RetrieveRequestTestCase(DetailRequestTestCaseMixin, RequestTestCase):
 
         return self.client.get(url, data)
 
+    def test_optimized_expansion(self):
+        url = '/thirds/{}/'.format(ThirdModel.objects.first().pk)
+
+        with self.assertNumQueries(1):
+            response = self.client.get(url, {'expand': 'extra,second'})
+
+        self.assertExpanded(response.data['second'])
+
 
 class PatchRequestTestCase(DetailRequestTestCaseMixin, RequestTestCase):
     """
@@ -144,6 +218,29 @@ class PatchRequestTestCase(DetailRequestTestCaseMixin, RequestTestCase):
 
         return self.client.patch(url, data, QUERY_STRING=query_string)
 
+    def test_optimized_expansion(self):
+        url = '/thirds/{}/'.format(ThirdModel.objects.first().pk)
+        query_string = urlencode({'expand': 'extra,second'})
+
+        with self.assertNumQueries(2):
+            response = self.client.patch(url, {'content': 'update'}, QUERY_STRING=query_string)
+
+        self.assertEqual('update', response.data['content'])
+        self.assertExpanded(response.data['second'])
+
+    def test_save_side_effects(self):
+        second = SecondModel.objects.first()
+        view = SecondFirstViewSet.as_view({'patch': 'partial_update'})
+        pre_save.connect(set_saved_content, sender=SecondModel)
+
+        try:
+            response = view(APIRequestFactory().patch('/', {}), pk=second.pk)
+        finally:
+            pre_save.disconnect(set_saved_content, sender=SecondModel)
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual('saved', SecondModel.objects.get(pk=second.pk).content)
+
 
 class PutRequestTestCase(DetailRequestTestCaseMixin, RequestTestCase):
     """
@@ -0,0 +1,99 @@
+import pytest
+
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory, APITestCase
+
+from rest_framework_expander import caches
+from rest_framework_expander.caches import ResponseCache
+from tests.models import FirstModel, SecondModel
+from tests.views import ThirdViewSet
+
+
+pytestmark = pytest.mark.django_db()
+
+
+class LinkHeaderPagination(PageNumberPagination):
+    page_size = 2
+
+    def get_paginated_response(self, data):
+        return Response(data, headers={'Link': '<{}>; rel="next"'.format(self.get_next_link())})
+
+
+class CachedThirdViewSet(ThirdViewSet):
+    expander_response_cache = ResponseCache('default', None)
+
+
+class PaginatedThirdViewSet(CachedThirdViewSet):
+    pagination_class = LinkHeaderPagination
+
+
+class ResponseCacheTestCase(APITestCase):
+    """
+    Tests the response cache of list views.
+    """
+
+    def setUp(self):
+        self.response_cache = caches.response_cache
+        caches.response_cache = CachedThirdViewSet.expander_response_cache
+        caches.response_cache.cache.clear()
+
+    def tearDown(self):
+        caches.response_cache = self.response_cache
+
+    def get_response(self, expand, viewset_class=CachedThirdViewSet, **params):
+        """
+        Helper method for requesting the cached list view.
+        """
+        params['expand'] = expand
+        request = APIRequestFactory().get('/', params)
+        response = viewset_class.as_view({'get': 'list'})(request)
+
+        if hasattr(response, 'render'):
+            response.render()
+
+        return response
+
+    def test_cached(self):
+        content = self.get_response('second').content
+
+        with self.assertNumQueries(0):
+            response = self.get_response('second')
+
+        self.assertEqual(content, response.content)
+        self.assertEqual('application/json', response['Content-Type'])
+
+    def test_cached_headers(self):
+        expected = self.get_response('second', PaginatedThirdViewSet)
+
+        with self.assertNumQueries(0):
+            response = self.get_response('second', PaginatedThirdViewSet)
+
+        self.assertEqual(expected.content, response.content)
+        self.assertIn('rel="next"', response['Link'])
+
+        for header in ('Link', 'Vary', 'Allow', 'Content-Type'):
+            self.assertEqual(expected[header], response[header])
+
+    def test_separated_by_request(self):
+        content = self.get_response('second').content
+
+        self.assertNotEqual(content, self.get_response('extra').content)
+        self.assertNotEqual(content, self.get_response('second', fields='id,second').content)
+
+    def test_invalidated_by_read_model(self):
+        self.get_response('second')
+        second = SecondModel.objects.first()
+        second.content = 'changed'
+        second.save()
+
+        self.assertIn(b'changed', self.get_response('second').content)
+
+    def test_not_invalidated_by_other_model(self):
+        self.get_response('extra')
+        first = FirstModel.objects.first()
+        first.content = 'changed'
+        first.save()
+
+        with self.assertNumQueries(0):
+            self.get_response('extra')
@@ -0,0 +1,56 @@
+from rest_framework.request import Request
+from rest_framework.test import APITestCase, APIRequestFactory
+
+from rest_framework_expander.adapters import ListExpanderAdapter
+from rest_framework_expander.parsers import ExpanderParser
+from tests.models import SecondModel, ThirdModel
+from tests.serializers import FirstSerializer, SecondSerializer, ThirdSerializer
+
+
+class OtherFirstSecondSerializer(SecondSerializer):
+    other = FirstSerializer(read_only=True, source='first')
+
+    class Meta(SecondSerializer.Meta):
+        fields = ('id', 'url', 'content', 'extra', 'first', 'other')
+
+
+class IdentityMapTestCase(APITestCase):
+    """
+    Tests sharing of representations within a request.
+    """
+
+    def get_data(self, serializer_class, queryset, expand):
+        """
+        Helper method for rendering queryset with a parsed request.
+        """
+        request = Request(APIRequestFactory().get('/', {'expand': expand}))
+        serializer = serializer_class(queryset, many=True, context={'request': request})
+        adapter = ListExpanderAdapter(serializer)
+
+        parser = ExpanderParser(adapter)
+        parser.max_depth = 2
+        adapter.context['expander'] = parser.parse()
+
+        return serializer.data
+
+    def test_shared_across_paths(self):
+        data = self.get_data(ThirdSerializer, ThirdModel.objects.all(), 'extra,second.extra')
+
+        for result in data:
+            self.assertEqual(result['extra']['id'], result['second']['extra']['id'])
+            self.assertIs(result['extra'], result['second']['extra'])
+
+    def test_separated_by_subtree(self):
+        data = self.get_data(OtherFirstSecondSerializer, SecondModel.objects.all(), 'first.extra,other')
+
+        for result in data:
+            self.assertEqual(result['first']['id'], result['other']['id'])
+            self.assertIn('content', result['first']['extra'])
+            self.assertNotIn('content', result['other']['extra'])
+
+    def test_separated_by_mode(self):
+        data = self.get_data(ThirdSerializer, ThirdModel.objects.all(), 'second')
+
+        self.assertIn('content', data[0]['second'])
+        self.assertNotIn('content', data[0]['second']['extra'])
+        self.assertNotIn('content', data[0]['extra'])
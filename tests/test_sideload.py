@@ -0,0 +1,92 @@
+import pytest
+
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+from rest_framework.serializers import Serializer
+from rest_framework.test import APITestCase, APIRequestFactory
+
+from rest_framework_expander.renderers import ExpanderSideloadJSONRenderer
+from rest_framework_expander.serializers import ExpanderSerializerMixin
+from tests.serializers import ExtraSerializer
+from tests.views import FirstViewSet, ThirdViewSet
+
+
+pytestmark = pytest.mark.django_db()
+
+
+class SideloadThirdViewSet(ThirdViewSet):
+    renderer_classes = (JSONRenderer, ExpanderSideloadJSONRenderer)
+
+
+class LinkHeaderPagination(PageNumberPagination):
+    page_size = 2
+
+    def get_paginated_response(self, data):
+        return Response(data, headers={'Link': '<{}>; rel="next"'.format(self.get_next_link())})
+
+
+class PaginatedThirdViewSet(ThirdViewSet):
+    pagination_class = LinkHeaderPagination
+
+
+class PlainSerializer(ExpanderSerializerMixin, Serializer):
+    pass
+
+
+class SideloadTestCase(APITestCase):
+    """
+    Tests side-loaded list responses.
+    """
+
+    def get_data(self, viewset_class, params, **kwargs):
+        """
+        Helper method for requesting a list view.
+        """
+        view = viewset_class.as_view({'get': 'list'})
+        return view(APIRequestFactory().get('/', params, **kwargs)).data
+
+    def test_query_parameter(self):
+        data = self.get_data(ThirdViewSet, {'expand': 'extra,second', 'sideload': 'true'})
+        included = data['included']
+
+        self.assertEqual(['tests.extramodel', 'tests.secondmodel'], sorted(included))
+
+        for result in data['results']:
+            self.assertIn('content', result)
+            self.assertEqual(['id', 'url'], list(result['extra']))
+            self.assertEqual(['id', 'url'], list(result['second']))
+            self.assertIn('content', included['tests.extramodel'][str(result['extra']['id'])])
+            self.assertIn('content', included['tests.secondmodel'][str(result['second']['id'])])
+
+    def test_renderer(self):
+        data = self.get_data(SideloadThirdViewSet, {'expand': 'extra'}, HTTP_ACCEPT=ExpanderSideloadJSONRenderer.media_type)
+
+        self.assertIn('tests.extramodel', data['included'])
+        self.assertEqual(['id', 'url'], list(data['results'][0]['extra']))
+
+    def test_list_expansion(self):
+        data = self.get_data(FirstViewSet, {'expand': 'seconds', 'sideload': '1'})
+        seconds = data['included']['tests.secondmodel']
+
+        for result in data['results']:
+            for second in result['seconds']['results']:
+                self.assertEqual(['id', 'url'], list(second))
+                self.assertIn('content', seconds[str(second['id'])])
+
+    def test_list_pagination(self):
+        view = PaginatedThirdViewSet.as_view({'get': 'list'})
+        response = view(APIRequestFactory().get('/', {'expand': 'extra', 'sideload': 'true'}))
+
+        self.assertIn('rel="next"', response['Link'])
+        self.assertEqual(2, len(response.data['results']))
+        self.assertIn('tests.extramodel', response.data['included'])
+
+    def test_disabled(self):
+        data = self.get_data(ThirdViewSet, {'expand': 'extra'})
+
+        self.assertIn('content', data[0]['extra'])
+
+    def test_included_type(self):
+        self.assertEqual('tests.extramodel', ExtraSerializer().get_included_type())
+        self.assertEqual('PlainSerializer', PlainSerializer().get_included_type())
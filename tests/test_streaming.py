@@ -0,0 +1,90 @@
+import json
+import pytest
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory, APITestCase
+
+from rest_framework_expander.fragments import ExpanderFragmentCache
+from rest_framework_expander.serializers import ExpanderSerializerMixin
+from tests.models import ThirdModel
+from tests.views import FirstViewSet, ThirdViewSet
+
+
+pytestmark = pytest.mark.django_db()
+
+
+class StreamingThirdViewSet(ThirdViewSet):
+    expander_stream = True
+    expander_stream_chunk_size = 2
+
+
+class OrderedThirdViewSet(ThirdViewSet):
+    queryset = ThirdModel.objects.order_by('-content')
+
+
+class StreamingOrderedThirdViewSet(StreamingThirdViewSet):
+    queryset = ThirdModel.objects.order_by('-content')
+
+
+class StreamingFirstViewSet(FirstViewSet):
+    expander_stream = True
+    expander_stream_chunk_size = 2
+    expander_stream_format = 'ndjson'
+
+
+class StreamingTestCase(APITestCase):
+    """
+    Tests streaming list responses.
+    """
+
+    def setUp(self):
+        self.fragment_cache = ExpanderSerializerMixin.fragment_cache
+        ExpanderSerializerMixin.fragment_cache = ExpanderFragmentCache(100)
+
+    def tearDown(self):
+        ExpanderSerializerMixin.fragment_cache = self.fragment_cache
+
+    def get_content(self, viewset_class, expand):
+        """
+        Helper method for reading the content of a list view.
+        """
+        view = viewset_class.as_view({'get': 'list'})
+        request = APIRequestFactory().get('/', {'expand': expand})
+        response = view(request)
+
+        if response.streaming:
+            return b''.join(response.streaming_content).decode('utf-8')
+
+        return response.render().content.decode('utf-8')
+
+    def test_json_stream(self):
+        count = ThirdModel.objects.count()
+        chunks = (count + 2) // 2
+
+        with self.assertNumQueries(chunks):
+            content = self.get_content(StreamingThirdViewSet, 'extra,second.first')
+
+        self.assertEqual(json.loads(self.get_content(ThirdViewSet, 'extra,second.first')), json.loads(content))
+
+    def test_ordered_stream(self):
+        ThirdModel.objects.filter(pk__in=ThirdModel.objects.values_list('pk', flat=True)[:3]).update(content='same')
+
+        with CaptureQueriesContext(connection) as context:
+            content = self.get_content(StreamingOrderedThirdViewSet, 'extra')
+
+        self.assertEqual(json.loads(self.get_content(OrderedThirdViewSet, 'extra')), json.loads(content))
+        self.assertFalse([query for query in context.captured_queries if 'OFFSET' in query['sql']])
+
+    def test_ndjson_stream(self):
+        content = self.get_content(StreamingFirstViewSet, 'seconds')
+        lines = content.splitlines()
+
+        self.assertTrue(lines)
+        self.assertEqual(json.loads(self.get_content(FirstViewSet, 'seconds')), [json.loads(line) for line in lines])
+
+    def test_fragments(self):
+        content = self.get_content(StreamingThirdViewSet, 'second')
+
+        self.assertEqual(json.loads(self.get_content(ThirdViewSet, 'second')), json.loads(content))
+        self.assertLess(0, len(ExpanderSerializerMixin.fragment_cache))
@@ -0,0 +1,55 @@
+from rest_framework.test import APITestCase
+
+from rest_framework_expander.serializers import ExpanderSerializerMixin
+from rest_framework_expander.templates import ExpanderFieldTemplateCache, is_templatable_serializer
+from tests.serializers import ExtraSerializer, FirstSerializer
+
+
+class DynamicExtraSerializer(ExtraSerializer):
+    def get_fields(self):
+        fields = super(DynamicExtraSerializer, self).get_fields()
+        fields.pop('content')
+        return fields
+
+
+class FieldTemplateTestCase(APITestCase):
+    """
+    Tests field templates shared between serializer instances.
+    """
+
+    def setUp(self):
+        self.field_templates = ExpanderSerializerMixin.field_templates
+        ExpanderSerializerMixin.field_templates = ExpanderFieldTemplateCache()
+
+    def tearDown(self):
+        ExpanderSerializerMixin.field_templates = self.field_templates
+
+    def test_shared_template(self):
+        first = FirstSerializer()
+        second = FirstSerializer()
+
+        self.assertEqual(list(first.fields.keys()), ['id', 'url', 'content', 'extra', 'seconds'])
+        self.assertEqual(list(second.fields.keys()), list(first.fields.keys()))
+        self.assertIs(first.field_template, second.field_template)
+        self.assertEqual(first.field_template.collapsed_field_names, ('id', 'url'))
+
+    def test_unbound_copies(self):
+        first = FirstSerializer()
+        second = FirstSerializer()
+        template = first.field_template
+
+        for field_name, field in first.fields.items():
+            self.assertIsNot(field, second.fields[field_name])
+            self.assertIsNot(field, template.fields[field_name])
+            self.assertIs(field.parent, first)
+            self.assertIsNone(getattr(template.fields[field_name], 'parent', None))
+
+    def test_dynamic_fields(self):
+        self.assertTrue(is_templatable_serializer(ExtraSerializer))
+        self.assertFalse(is_templatable_serializer(DynamicExtraSerializer))
+
+        serializer = DynamicExtraSerializer()
+
+        self.assertIsNone(serializer.field_template)
+        self.assertNotIn('content', serializer.fields)
+        self.assertIn('content', ExtraSerializer().fields)
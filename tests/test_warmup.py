@@ -0,0 +1,74 @@
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.utils.six import StringIO
+from rest_framework.serializers import HyperlinkedModelSerializer
+from rest_framework.test import APITestCase
+
+from rest_framework_expander.parsers import ExpanderParser
+from rest_framework_expander.plans import ExpanderPlanCache
+from rest_framework_expander.serializers import ExpanderListSerializer, ExpanderSerializerMixin
+from rest_framework_expander.warmup import ExpanderWarmUp, get_expander_views
+from tests.models import FirstModel
+from tests.views import ExtraViewSet, FirstViewSet, SecondViewSet, ThirdViewSet, TaggedViewSet
+
+
+class BrokenFirstSerializer(ExpanderSerializerMixin, HyperlinkedModelSerializer):
+    seconds = ExpanderListSerializer('tests.serializers.MissingSerializer', 'firstmodel-detail')
+
+    class Meta():
+        model = FirstModel
+        fields = ('id', 'url', 'seconds')
+
+
+class BrokenFirstViewSet(FirstViewSet):
+    serializer_class = BrokenFirstSerializer
+
+
+class DetailFirstViewSet(FirstViewSet):
+    def get_queryset(self):
+        return FirstModel.objects.filter(pk=self.kwargs['pk'])
+
+
+class WarmUpTestCase(APITestCase):
+    """
+    Tests warming up the expander views before the first request.
+    """
+
+    def setUp(self):
+        self.plan_cache = ExpanderParser.plan_cache
+        ExpanderParser.plan_cache = ExpanderPlanCache(64)
+
+    def tearDown(self):
+        ExpanderParser.plan_cache = self.plan_cache
+
+    def test_views(self):
+        views = get_expander_views()
+
+        self.assertEqual(views, [ExtraViewSet, FirstViewSet, SecondViewSet, ThirdViewSet, TaggedViewSet])
+
+    def test_cached_plans(self):
+        with self.assertNumQueries(0):
+            results = ExpanderWarmUp([ThirdViewSet]).run()
+
+        self.assertEqual(results[ThirdViewSet], [('extra',), ('second',)])
+        self.assertEqual(2, len(ExpanderParser.plan_cache))
+
+        self.client.get('/thirds/', {'expand': 'second'})
+
+        self.assertEqual(1, ExpanderParser.plan_cache.hits)
+
+    def test_broken_path(self):
+        with self.assertRaises(ImproperlyConfigured):
+            ExpanderWarmUp([BrokenFirstViewSet]).run()
+
+    def test_queryset_needs_request(self):
+        results = ExpanderWarmUp([DetailFirstViewSet]).run()
+
+        self.assertEqual(results[DetailFirstViewSet], [('extra',), ('seconds',)])
+        self.assertEqual(2, len(ExpanderParser.plan_cache))
+
+    def test_command(self):
+        out = StringIO()
+        call_command('expander_warmup', stdout=out)
+
+        self.assertIn('tests.views.ThirdViewSet: 2 expandable paths', out.getvalue())
@@ -1,6 +1,7 @@
 from rest_framework import routers
+from rest_framework.urlpatterns import format_suffix_patterns
 
-from tests.views import ExtraViewSet, FirstViewSet, SecondViewSet, ThirdViewSet
+from tests.views import ExtraViewSet, FirstViewSet, SecondViewSet, ThirdViewSet, TaggedViewSet
 
 
 router = routers.SimpleRouter()
@@ -9,5 +10,6 @@ router.register('extras', ExtraViewSet)
 router.register('firsts', FirstViewSet)
 router.register('seconds', SecondViewSet)
 router.register('thirds', ThirdViewSet)
+router.register('tagged', TaggedViewSet)
 
-urlpatterns = router.urls
+urlpatterns = format_suffix_patterns(router.urls)
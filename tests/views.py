@@ -1,25 +1,37 @@
 from rest_framework.viewsets import ModelViewSet
 
-from rest_framework_expander.views import ExpanderListModelMixin
-from tests.models import ExtraModel, FirstModel, SecondModel, ThirdModel
-from tests.serializers import ExtraSerializer, FirstSerializer, SecondSerializer, ThirdSerializer
+from rest_framework_expander.views import (
+    ExpanderCreateModelMixin, ExpanderListModelMixin, ExpanderRetrieveModelMixin, ExpanderUpdateModelMixin
+)
+from tests.models import ExtraModel, FirstModel, SecondModel, ThirdModel, TaggedModel
+from tests.serializers import ExtraSerializer, FirstSerializer, SecondSerializer, ThirdSerializer, TaggedSerializer
 
 
-class ExtraViewSet(ExpanderListModelMixin, ModelViewSet):
+class ExpanderModelViewSet(ExpanderListModelMixin, ExpanderRetrieveModelMixin, ExpanderCreateModelMixin,
+                           ExpanderUpdateModelMixin, ModelViewSet):
+    pass
+
+
+class ExtraViewSet(ExpanderModelViewSet):
     queryset = ExtraModel.objects.all()
     serializer_class = ExtraSerializer
 
 
-class FirstViewSet(ExpanderListModelMixin, ModelViewSet):
+class FirstViewSet(ExpanderModelViewSet):
     queryset = FirstModel.objects.all()
     serializer_class = FirstSerializer
 
 
-class SecondViewSet(ExpanderListModelMixin, ModelViewSet):
+class SecondViewSet(ExpanderModelViewSet):
     queryset = SecondModel.objects.all()
     serializer_class = SecondSerializer
 
 
-class ThirdViewSet(ExpanderListModelMixin, ModelViewSet):
+class ThirdViewSet(ExpanderModelViewSet):
     queryset = ThirdModel.objects.all()
     serializer_class = ThirdSerializer
+
+
+class TaggedViewSet(ExpanderModelViewSet):
+    queryset = TaggedModel.objects.all()
+    serializer_class = TaggedSerializer